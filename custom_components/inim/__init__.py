@@ -1,43 +1,150 @@
 """Nintendo Wishlist integration."""
+
 from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import timedelta
 import logging
-
-from pyinim.inim_cloud import InimCloud
+import re
 
 from homeassistant import core
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_PASSWORD,
-    CONF_SCAN_INTERVAL,
     CONF_USERNAME,
     Platform,
 )
 from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_CLIENT_ID, CONF_DEVICE_ID, DOMAIN
-from .types import InimResult
+from .const import (
+    CONF_CLIENT_ID,
+    CONF_DEVICE_ID,
+    CONF_POLL_STRATEGY,
+    DEFAULT_POLL_STRATEGY,
+    DOMAIN,
+)
+from .coordinator import InimCoordinator
+from .hub import InimHub, async_get_hub, async_release_hub
+from .options import get_scan_interval, get_scan_interval_bounds
+from .polling import AdaptivePollPolicy
+from .services import async_setup_services
+from .snapshot_cache import InimSnapshotCache
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
     Platform.ALARM_CONTROL_PANEL,
+    Platform.SENSOR,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 
 @dataclass
 class RuntimeData:
     """Class to hold inim data."""
 
-    coordinator: DataUpdateCoordinator
-    inim_cloud_api: InimCloud
+    coordinator: InimCoordinator
+    hub: InimHub
     cancel_update_listener: Callable
 
 
+async def async_setup(hass: core.HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services of the integration."""
+    async_setup_services(hass)
+    return True
+
+
+async def async_migrate_entry(
+    hass: core.HomeAssistant, config_entry: ConfigEntry
+) -> bool:
+    """Migrate the entries of older versions of the config flow."""
+    if config_entry.version > 1:
+        # Downgraded from a future version.
+        return False
+    if config_entry.minor_version < 2:
+        # The unique_id used to be the title, then the title and the device.
+        from .config_flow import entry_unique_id  # noqa: PLC0415
+
+        unique_id = entry_unique_id(
+            config_entry.data[CONF_USERNAME], config_entry.data[CONF_DEVICE_ID]
+        )
+        if any(
+            entry.unique_id == unique_id
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.entry_id != config_entry.entry_id
+        ):
+            _LOGGER.warning(
+                "Inim entry %s duplicates the one of device %s, remove one of them",
+                config_entry.title,
+                config_entry.data[CONF_DEVICE_ID],
+            )
+            unique_id = config_entry.unique_id
+        hass.config_entries.async_update_entry(
+            config_entry, unique_id=unique_id, minor_version=2
+        )
+    if config_entry.minor_version < 3:
+        await _async_migrate_zone_ids(hass, config_entry)
+        hass.config_entries.async_update_entry(config_entry, minor_version=3)
+    return True
+
+
+async def _async_migrate_zone_ids(
+    hass: core.HomeAssistant, config_entry: ConfigEntry
+) -> None:
+    """Put the device_id in the unique_ids and the devices of the zones.
+
+    They used to be keyed by the ZoneId alone, which repeats across devices.
+    """
+    from .binary_sensor import ZONE_SENSORS, zone_device_identifier  # noqa: PLC0415
+
+    device_id = config_entry.data[CONF_DEVICE_ID]
+    # binary_sensor.inim_{zone_id}_{key}, and binary_sensor.inim_{slug}_{zone_id}
+    # for the status sensor, named after the zone.
+    keys = "|".join(description.key for description in ZONE_SENSORS[1:])
+    keyed = re.compile(rf"binary_sensor\.inim_(\d+)_({keys})")
+    named = re.compile(r"binary_sensor\.inim_.+_(\d+)")
+
+    @core.callback
+    def _async_update_unique_id(entry: er.RegistryEntry) -> dict[str, str] | None:
+        if entry.domain != Platform.BINARY_SENSOR:
+            return None
+        if match := keyed.fullmatch(entry.unique_id):
+            unique_id = f"binary_sensor.inim_{device_id}_{match[1]}_{match[2]}"
+        elif match := named.fullmatch(entry.unique_id):
+            unique_id = f"binary_sensor.inim_{device_id}_{match[1]}"
+        else:
+            return None
+        if unique_id == entry.unique_id:
+            return None
+        return {"new_unique_id": unique_id}
+
+    await er.async_migrate_entries(hass, config_entry.entry_id, _async_update_unique_id)
+
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(
+        device_registry, config_entry.entry_id
+    ):
+        # The panels and the diagnostic sensors have string identifiers.
+        zone_ids = [
+            value
+            for domain, value in device.identifiers
+            if domain == DOMAIN and isinstance(value, int)
+        ]
+        if zone_ids:
+            device_registry.async_update_device(
+                device.id,
+                new_identifiers={
+                    (DOMAIN, zone_device_identifier(device_id, zone_ids[0]))
+                },
+            )
+
+
 async def async_setup_entry(
     hass: core.HomeAssistant, config_entry: ConfigEntry
 ) -> bool:
@@ -49,36 +156,36 @@ async def async_setup_entry(
     password = config_entry.data[CONF_PASSWORD]
     client_id = config_entry.data[CONF_CLIENT_ID]
     device_id = config_entry.data[CONF_DEVICE_ID]
-    scan_interval = timedelta(seconds=config_entry.data[CONF_SCAN_INTERVAL])
-
-    inim_cloud_api = InimCloud(
-        async_get_clientsession(hass),
-        name="Inim",
-        username=username,
-        password=password,
-        client_id=client_id,
-    )
+    scan_interval = get_scan_interval(config_entry)
+    min_scan_interval, max_scan_interval = get_scan_interval_bounds(config_entry)
 
-    async def async_fetch_inim() -> InimResult | None:
-        try:
-            await inim_cloud_api.get_request_poll(device_id)
-            _, _, res = await inim_cloud_api.get_devices_extended(device_id)
-            return res
-        except Exception as ex:
-            # raise ConfigEntryAuthFailed("Credentials expired for Inim Cloud") from ex
-            config_entry.async_start_reauth(hass)
+    # Entries of the same account share the session, the token and the polls.
+    hub = await async_get_hub(
+        hass, config_entry.entry_id, username, password, client_id
+    )
+    config_entry.async_on_unload(
+        lambda: async_release_hub(hass, config_entry.entry_id, hub)
+    )
 
-    coordinator = DataUpdateCoordinator(
+    coordinator = InimCoordinator(
         hass,
-        _LOGGER,
-        # Name of the data. For logging purposes.
-        name=DOMAIN,
-        update_method=async_fetch_inim,
-        # Polling interval. Will only be polled if there are subscribers.
-        update_interval=scan_interval,
+        config_entry,
+        hub,
+        device_id,
+        AdaptivePollPolicy(scan_interval, min_scan_interval, max_scan_interval),
+        config_entry.data.get(CONF_POLL_STRATEGY, DEFAULT_POLL_STRATEGY),
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    # Take the refreshes of the other devices of the account, and have
+    # theirs poll this one too.
+    config_entry.async_on_unload(
+        hub.async_subscribe(device_id, coordinator.async_set_shared_result)
+    )
+
+    # Start from the cached snapshot when there is one, the live refresh
+    # runs in the background once the platforms are set up.
+    if not (stale := await coordinator.async_load_snapshot()):
+        await coordinator.async_config_entry_first_refresh()
     # or
     # await coordinator.async_refresh()
 
@@ -94,9 +201,7 @@ async def async_setup_entry(
     # ----------------------------------------------------------------------------
     # Initialise a listener for config flow options changes.
     # This will be removed automatically if the integraiton is unloaded.
-    # See config_flow for defining an options setting that shows up as configure
-    # on the integration.
-    # If you do not want any config flow options, no need to have listener.
+    # The platforms register their own, to update their entities in place.
     # ----------------------------------------------------------------------------
     cancel_update_listener = config_entry.async_on_unload(
         config_entry.add_update_listener(_async_update_listener)
@@ -108,7 +213,7 @@ async def async_setup_entry(
     # Note: this will change on HA2024.6 to save on the config entry.
     # ----------------------------------------------------------------------------
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = RuntimeData(
-        coordinator, inim_cloud_api, cancel_update_listener
+        coordinator, hub, cancel_update_listener
     )
 
     # ----------------------------------------------------------------------------
@@ -116,59 +221,41 @@ async def async_setup_entry(
     # This calls the async_setup method in each of your entity type files.
     # ----------------------------------------------------------------------------
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
-    # ----------------------------------------------------------------------------
-    # Setup global services
-    # This can be done here but included in a seperate file for ease of reading.
-    # See also switch.py for entity services examples
-    # ----------------------------------------------------------------------------
-    # TODO: ExampleServicesSetup(hass, config_entry)
 
+    if stale:
+        config_entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} {device_id} first refresh"
+        )
     # Return true to denote a successful setup.
     return True
 
 
+async def async_unload_entry(
+    hass: core.HomeAssistant, config_entry: ConfigEntry
+) -> bool:
+    """Unload a config entry."""
+    if unload_ok := await hass.config_entries.async_unload_platforms(
+        config_entry, PLATFORMS
+    ):
+        hass.data[DOMAIN].pop(config_entry.entry_id)
+    return unload_ok
+
+
+async def async_remove_entry(
+    hass: core.HomeAssistant, config_entry: ConfigEntry
+) -> None:
+    """Delete the cached snapshot of a removed entry."""
+    await InimSnapshotCache(hass, config_entry.entry_id).async_remove()
+
+
 async def _async_update_listener(hass: core.HomeAssistant, config_entry: ConfigEntry):
     """Handle config options update.
 
-    Reload the integration when the options change.
+    Apply the new scan intervals without reloading the integration, so the
+    session, the token and the entities are kept.
     Called from our listener created above.
     """
-    await hass.config_entries.async_reload(config_entry.entry_id)
-
-
-# class MyCoordinator(DataUpdateCoordinator):
-#     """My custom coordinator."""
-
-#     def __init__(self, hass, my_api):
-#         """Initialize my coordinator."""
-#         super().__init__(
-#             hass,
-#             _LOGGER,
-#             # Name of the data. For logging purposes.
-#             name="My sensor",
-#             # Polling interval. Will only be polled if there are subscribers.
-#             update_interval=timedelta(seconds=30),
-#         )
-#         self.my_api = my_api
-
-#     async def _async_update_data(self):
-#         """Fetch data from API endpoint.
-
-#         This is the place to pre-process the data to lookup tables
-#         so entities can quickly look up their data.
-#         """
-#         try:
-#             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-#             # handled by the data update coordinator.
-#             async with async_timeout.timeout(10):
-#                 # Grab active context variables to limit data required to be fetched from API
-#                 # Note: using context is not required if there is no need or ability to limit
-#                 # data retrieved from API.
-#                 listening_idx = set(self.async_contexts())
-#                 return await self.my_api.fetch_data(listening_idx)
-#         except ApiAuthError as err:
-#             # Raising ConfigEntryAuthFailed will cancel future updates
-#             # and start a config flow with SOURCE_REAUTH (async_step_reauth)
-#             raise ConfigEntryAuthFailed from err
-#         except ApiError as err:
-#             raise UpdateFailed(f"Error communicating with API: {err}")
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    coordinator.async_set_scan_interval(
+        get_scan_interval(config_entry), *get_scan_interval_bounds(config_entry)
+    )
@@ -1,11 +1,13 @@
 """Support for INIM Alarm Control Panels."""
 
-from collections.abc import Mapping
+import asyncio
+from collections.abc import Mapping, Sequence
 from functools import cached_property
 import logging
+from time import monotonic
+from typing import TYPE_CHECKING
 
 # from aiohttp import ClientError
-from pyinim.inim_cloud import InimCloud
 
 # from config.inim_alarm.custom_components.inim.types import InimResult #TODO fix broken import
 from homeassistant.components.alarm_control_panel import (
@@ -14,55 +16,74 @@ from homeassistant.components.alarm_control_panel import (
     AlarmControlPanelState,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
+
+from .commands import CommandOutcome
+from .const import (
+    CONF_DEVICE_ID,
+    CONF_SCENARIOS,
+    CONF_STATE_PRECEDENCE,
+    CONFIRM_INTERVAL,
+    CONFIRM_TIMEOUT,
+    DEFAULT_STATE_PRECEDENCE,
+    DOMAIN,
+    SCENARIOS_CONTEXT,
 )
+from .coordinator import InimCoordinator
+from .entity import InimEntity
+from .options import get_panels
 
-from .const import CONF_DEVICE_ID, CONF_PANELS, CONF_SCENARIOS, DOMAIN
+if TYPE_CHECKING:
+    from .hub import InimHub
 
 _LOGGER = logging.getLogger(__name__)
 
 CONST_MANUFACTURER = "Inim"
 
 
+def reverse_scenarios(
+    scenarios: Mapping[str, int], precedence: Sequence[str]
+) -> dict[int, tuple[int, AlarmControlPanelState]]:
+    """Map every scenario to the rank and state it stands for.
+
+    A scenario shared by several states stands for the first one of
+    `precedence`, and the lowest rank wins among the active scenarios.
+    """
+    state_by_scenario: dict[int, tuple[int, AlarmControlPanelState]] = {}
+    for rank, state in enumerate(precedence):
+        if (scenario := scenarios.get(state)) is not None:
+            state_by_scenario.setdefault(
+                scenario, (rank, AlarmControlPanelState(state))
+            )
+    return state_by_scenario
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ):
     """Set up the Alarm Control Panel."""
-    # This gets the DataUpdateCoordinator from hass.data as specified in your __init__.py
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][
-        config_entry.entry_id
-    ].coordinator
+    # This gets the InimCoordinator from hass.data as specified in your __init__.py
+    coordinator: InimCoordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
 
-    inim_cloud_api = hass.data[DOMAIN][config_entry.entry_id].inim_cloud_api
+    hub = hass.data[DOMAIN][config_entry.entry_id].hub
 
-    panels = config_entry.data[CONF_PANELS]
+    panels = get_panels(config_entry)
     device_id = config_entry.data[CONF_DEVICE_ID]
 
-    # Fetch initial data so we have data when entities subscribe
-    #
-    # If the refresh fails, async_config_entry_first_refresh will
-    # raise ConfigEntryNotReady and setup will try again later
-    #
-    # If you do not want to retry setup on failure, use
-    # coordinator.async_refresh() instead
-    #
-    # await coordinator.async_config_entry_first_refresh()
-    # devices: InimResult = coordinator.data
-    _LOGGER.warning(
+    # The coordinator already holds the first snapshot, every panel resolves
+    # its state out of it, see async_setup_entry in __init__.py.
+    _LOGGER.debug(
         "INIM alarm panel was created/updated for the following panels: %s", panels
     )
     alarm_control_panels = [
         InimAlarmControlPanelEntity(
             coordinator,
-            inim_cloud_api,
+            hub,
             device_id,
             panel_conf,
             "0.0.1",
@@ -70,11 +91,26 @@ async def async_setup_entry(
         for panel_conf in panels
     ]
 
-    # Create the alarm control panel
-    async_add_entities(alarm_control_panels, update_before_add=True)
+    # Create the alarm control panel, out of the coordinator data already
+    # there: a refresh before adding would hold the startup on the cloud.
+    async_add_entities(alarm_control_panels)
+
+    entities = {entity.unique_id: entity for entity in alarm_control_panels}
 
+    async def _async_options_updated(
+        hass: HomeAssistant, config_entry: ConfigEntry
+    ) -> None:
+        """Give the panels their new scenarios, without a reload."""
+        for panel_conf in get_panels(config_entry):
+            if (entity := entities.get(panel_conf["unique_id"])) is not None:
+                entity.async_set_panel(panel_conf)
 
-class InimAlarmControlPanelEntity(CoordinatorEntity, AlarmControlPanelEntity):
+    config_entry.async_on_unload(
+        config_entry.add_update_listener(_async_options_updated)
+    )
+
+
+class InimAlarmControlPanelEntity(InimEntity, AlarmControlPanelEntity):
     """Representation of an Inim Alarm Control Panel."""
 
     _attr_supported_features = (
@@ -89,20 +125,23 @@ class InimAlarmControlPanelEntity(CoordinatorEntity, AlarmControlPanelEntity):
 
     def __init__(
         self,
-        coordinator: DataUpdateCoordinator,  # TODO: provide proper Generic type ie: # coordinator: DataUpdateCoordinator[InimResult],
-        inim: InimCloud,
+        coordinator: InimCoordinator,
+        inim: "InimHub",
         device_id: str,
         panel,  # TODO add type
         version: str,
     ):
         """Initialize the alarm control panel."""
 
-        super().__init__(coordinator)  # , context=zone.ZoneId)
+        super().__init__(coordinator, context=SCENARIOS_CONTEXT)
 
         panel_name = panel["panel_name"]
         self._client = inim
         self._device_id = device_id
-        self._scenarios = panel[CONF_SCENARIOS]
+        self._async_set_scenarios(panel)
+        # State requested by the last command, until the panel confirms it.
+        self._pending_state: str | None = None
+        self._confirm_task: asyncio.Task | None = None
         self._attr_unique_id = panel["unique_id"]
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, self._attr_unique_id)},
@@ -112,6 +151,26 @@ class InimAlarmControlPanelEntity(CoordinatorEntity, AlarmControlPanelEntity):
             sw_version=version,
         )
 
+    @callback
+    def _async_set_scenarios(self, panel) -> None:
+        """Build the scenario maps of `panel` and resolve the state with them."""
+        self._scenarios = panel[CONF_SCENARIOS]
+        self._precedence = panel.get(CONF_STATE_PRECEDENCE, DEFAULT_STATE_PRECEDENCE)
+        self._state_by_scenario = reverse_scenarios(self._scenarios, self._precedence)
+        self._reported_state = self._state_from_data()
+
+    @callback
+    def async_set_panel(self, panel) -> None:
+        """Switch to the scenarios of a panel changed by the options flow."""
+        if panel[CONF_SCENARIOS] == self._scenarios and (
+            panel.get(CONF_STATE_PRECEDENCE, DEFAULT_STATE_PRECEDENCE)
+            == self._precedence
+        ):
+            return
+        self._async_end_pending()
+        self._async_set_scenarios(panel)
+        self.async_write_ha_state()
+
     @cached_property
     def code_arm_required(self) -> bool:
         """Whether the code is required for arm actions."""
@@ -120,38 +179,24 @@ class InimAlarmControlPanelEntity(CoordinatorEntity, AlarmControlPanelEntity):
         return False  # self._attr_code_arm_required
 
     @property
-    def alarm_state(self) -> AlarmControlPanelState:
+    def alarm_state(self) -> AlarmControlPanelState | None:
         """Return the state of the entity."""
-        try:
-            device_data = self.coordinator.data.Data[self._device_id]
-            scenarios = (int(x) for x in device_data.ActiveScenarios.split(","))
-
-            for scenario in scenarios:
-                _LOGGER.info(
-                    "INIM alarm panel %s state is going to be updated with the following scenario %s",
-                    self._attr_unique_id,
-                    scenario,
-                )
-                if scenario == self._scenarios[AlarmControlPanelState.ARMED_AWAY]:
-                    return AlarmControlPanelState.ARMED_AWAY
-
-                if scenario == self._scenarios[AlarmControlPanelState.DISARMED]:
-                    return AlarmControlPanelState.DISARMED
-
-                if scenario == self._scenarios[AlarmControlPanelState.ARMED_NIGHT]:
-                    return AlarmControlPanelState.ARMED_NIGHT
-
-                if scenario == self._scenarios[AlarmControlPanelState.ARMED_HOME]:
-                    return AlarmControlPanelState.ARMED_HOME
-
-                if scenario == self._scenarios[AlarmControlPanelState.ARMED_VACATION]:
-                    return AlarmControlPanelState.ARMED_VACATION
-
-                # if scenario == self._scenarios[STATE_ALARM_ARMED_CUSTOM_BYPASS]:
-                #     return STATE_ALARM_ARMED_CUSTOM_BYPASS
-
-        except Exception as e:
-            _LOGGER.exception("Error retrieving data from INIM services: %s", e)
+        if self._pending_state == AlarmControlPanelState.DISARMED:
+            return AlarmControlPanelState.DISARMING
+        if self._pending_state is not None:
+            return AlarmControlPanelState.ARMING
+        return self._reported_state
+
+    def _state_from_data(self) -> AlarmControlPanelState | None:
+        """Resolve the active scenarios through the reverse map."""
+        if (data := self.coordinator.data) is None:
+            return None
+        matches = [
+            self._state_by_scenario[scenario]
+            for scenario in data.active_scenarios
+            if scenario in self._state_by_scenario
+        ]
+        return min(matches)[1] if matches else None
 
     async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send disarm command."""
@@ -177,13 +222,87 @@ class InimAlarmControlPanelEntity(CoordinatorEntity, AlarmControlPanelEntity):
     #     """Send arm vacation command."""
     #     await self._async_arm(AlarmControlPanelState.ARMED_CUSTOM_BYPASS)
 
+    def _scenario_active(self, scenario: int) -> bool:
+        """Whether the panel reports `scenario` among its ActiveScenarios."""
+        if (data := self.coordinator.data) is None:
+            return False
+        return scenario in data.active_scenarios
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Resolve the new state, leaving arming/disarming once confirmed."""
+        self._reported_state = self._state_from_data()
+        if self._pending_state is not None and self._scenario_active(
+            self._scenarios[self._pending_state]
+        ):
+            self._async_end_pending()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_end_pending(self) -> None:
+        self._pending_state = None
+        if self._confirm_task is not None:
+            self._confirm_task.cancel()
+            self._confirm_task = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop confirming a pending command."""
+        self._async_end_pending()
+        await super().async_will_remove_from_hass()
+
+    async def _async_confirm(self, state: str) -> None:
+        """Refresh until the panel reports the scenario of `state`.
+
+        Roll back to the reported state if it does not within CONFIRM_TIMEOUT.
+        """
+        scenario = self._scenarios[state]
+        deadline = monotonic() + CONFIRM_TIMEOUT.total_seconds()
+        while monotonic() < deadline:
+            await asyncio.sleep(CONFIRM_INTERVAL.total_seconds())
+            await self.coordinator.async_refresh()
+            if self._pending_state != state:
+                # Confirmed by the coordinator update.
+                return
+            if self._scenario_active(scenario):
+                break
+        else:
+            _LOGGER.warning(
+                "INIM alarm panel %s did not confirm %s/%s in time",
+                self._attr_unique_id,
+                state,
+                scenario,
+            )
+        self._confirm_task = None
+        self._async_end_pending()
+        self.async_write_ha_state()
+
     async def _async_arm(self, state: str):
-        await self._client.get_activate_scenario(
-            self._device_id, self._scenarios[state]
+        self._async_end_pending()
+        self._pending_state = state
+        self.async_write_ha_state()
+        try:
+            result = await self.coordinator.commands.async_activate_scenario(
+                self._scenarios[state]
+            )
+        except Exception:
+            self._async_end_pending()
+            self.async_write_ha_state()
+            raise
+        if result.outcome is CommandOutcome.SUPERSEDED:
+            # A newer command for the device replaced this one.
+            if self._pending_state == state:
+                self._async_end_pending()
+                self.async_write_ha_state()
+            return
+        self._confirm_task = self.coordinator.config_entry.async_create_background_task(
+            self.hass,
+            self._async_confirm(state),
+            f"{self._attr_unique_id} confirm {state}",
         )
         _LOGGER.info(
-            "INIM alarm panel %s is going to be updated with %s/%s",
+            "INIM alarm panel %s is going to be updated with %s/%s (sent in %.3fs)",
             self._attr_unique_id,
             state,
             self._scenarios[state],
+            result.latency,
         )
@@ -1,22 +1,72 @@
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
 
 from homeassistant import core
-from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, Platform
+from homeassistant.helpers import device_registry as dr, entity_registry as er
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-)
-from homeassistant.util import slugify
 
 from .const import CONF_DEVICE_ID, DOMAIN
-from .types import Device, InimResult, Zone
+from .coordinator import InimCoordinator
+from .entity import InimEntity
+from .options import get_zones
+from .types import ZoneSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class InimZoneBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """A binary sensor of every zone and how to read it out of the zone."""
+
+    value_fn: Callable[[ZoneSnapshot], bool]
+
+
+# The first one is the historical zone sensor, named after the zone alone.
+ZONE_SENSORS: tuple[InimZoneBinarySensorEntityDescription, ...] = (
+    InimZoneBinarySensorEntityDescription(
+        key="status",
+        value_fn=lambda zone: zone.status == 2,
+    ),
+    InimZoneBinarySensorEntityDescription(
+        key="tamper",
+        name="Tamper",
+        device_class=BinarySensorDeviceClass.TAMPER,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda zone: zone.tamper_memory != 0,
+    ),
+    InimZoneBinarySensorEntityDescription(
+        key="bypassed",
+        name="Bypassed",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda zone: zone.bypassed != 0,
+    ),
+    InimZoneBinarySensorEntityDescription(
+        key="alarm_memory",
+        name="Alarm memory",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda zone: zone.alarm_memory != 0,
+    ),
+)
+
+
+def zone_device_identifier(device_id: str, zone_id: int) -> str:
+    """Return the identifier of the device of a zone in the device registry."""
+    return f"{device_id}_{zone_id}"
+
+
 async def async_setup_entry(
     hass: core.HomeAssistant,
     config_entry: ConfigEntry,
@@ -24,41 +74,109 @@ async def async_setup_entry(
 ):
     """Set up the Binary Sensors."""
     # This gets the data update coordinator from hass.data as specified in your __init__.py
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][
-        config_entry.entry_id
-    ].coordinator
+    coordinator: InimCoordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
 
     device_id = config_entry.data[CONF_DEVICE_ID]
-    res: Device = coordinator.data.Data[device_id]
-
-    binary_sensors = [
-        InimBinarySensorEntity(coordinator, zone, device_id) for zone in res.Zones
-    ]
-
-    # Create the binary sensors.
-    async_add_entities(binary_sensors)
 
+    # Binary sensors of every zone added so far, by ZoneId.
+    zone_entities: dict[int, list[InimBinarySensorEntity]] = {}
+
+    @core.callback
+    def _async_add_new_zones() -> None:
+        """Add the binary sensors of every included zone not seen yet.
+
+        The first snapshot may come from the snapshot cache, so zones can
+        show up with a later refresh.
+        """
+        if coordinator.data is None:
+            return
+        included = get_zones(config_entry)
+        new_zones = [
+            zone_id
+            for zone_id in sorted(coordinator.data.zones.keys() - zone_entities.keys())
+            if included is None or zone_id in included
+        ]
+        if not new_zones:
+            return
+        for zone_id in new_zones:
+            zone_entities[zone_id] = [
+                InimBinarySensorEntity(
+                    coordinator, coordinator.data.zones[zone_id], device_id, description
+                )
+                for description in ZONE_SENSORS
+            ]
+        # Create the binary sensors.
+        async_add_entities(
+            entity for zone_id in new_zones for entity in zone_entities[zone_id]
+        )
 
-class InimBinarySensorEntity(CoordinatorEntity, BinarySensorEntity):
-    """Represents a Presense Sensor for every Zone."""
+    async def _async_options_updated(
+        hass: core.HomeAssistant, config_entry: ConfigEntry
+    ) -> None:
+        """Remove the zones no longer included and their devices, add the new ones."""
+        if (included := get_zones(config_entry)) is not None:
+            registry = er.async_get(hass)
+            device_registry = dr.async_get(hass)
+            for zone_id in zone_entities.keys() - included:
+                for entity in zone_entities.pop(zone_id):
+                    if entity_id := registry.async_get_entity_id(
+                        Platform.BINARY_SENSOR, DOMAIN, entity.unique_id
+                    ):
+                        registry.async_remove(entity_id)
+                if device := device_registry.async_get_device(
+                    identifiers={(DOMAIN, zone_device_identifier(device_id, zone_id))}
+                ):
+                    device_registry.async_update_device(
+                        device.id, remove_config_entry_id=config_entry.entry_id
+                    )
+        _async_add_new_zones()
+        # Zones nobody listened to are not indexed, a full refresh brings them.
+        if (data := coordinator.data) is not None and any(
+            zone_id not in zone_entities
+            for zone_id in data.zone_ids
+            if included is None or zone_id in included
+        ):
+            await coordinator.async_reindex()
+
+    _async_add_new_zones()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_add_new_zones))
+    config_entry.async_on_unload(
+        config_entry.add_update_listener(_async_options_updated)
+    )
+
+
+class InimBinarySensorEntity(InimEntity, BinarySensorEntity):
+    """Represents a Presense Sensor for every Zone, or another of ZONE_SENSORS.
+
+    Every sensor of a zone reads the same ZoneSnapshot, looked up by ZoneId,
+    and is notified under the same coordinator context.
+    """
+
+    entity_description: InimZoneBinarySensorEntityDescription
 
     def __init__(  # noqa: D107
         self,
-        coordinator: DataUpdateCoordinator[InimResult],
-        zone: Zone,
+        coordinator: InimCoordinator,
+        zone: ZoneSnapshot,
         device_id: str,
+        description: InimZoneBinarySensorEntityDescription = ZONE_SENSORS[0],
     ):
-        super().__init__(coordinator, context=zone.ZoneId)
-
-        self._zone = zone
+        super().__init__(coordinator, context=zone.zone_id)
+
+        self.entity_description = description
+        self._zone_id = zone.zone_id
+        self._attr_name = (
+            f"{zone.name} {description.name}"
+            if isinstance(description.name, str)
+            else zone.name
+        )
         self._device_id = device_id
         self.attrs = {}
-        self._attr_extra_state_attributes = {}
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, zone.ZoneId)},
+            identifiers={(DOMAIN, zone_device_identifier(device_id, zone.zone_id))},
             manufacturer="Inim",
-            model=zone.Type,
-            name=zone.Name,
+            model=zone.type,
+            name=zone.name,
         )
         self._attr_unique_id = self.get_unique_id()
 
@@ -70,23 +188,22 @@ class InimBinarySensorEntity(CoordinatorEntity, BinarySensorEntity):
     @property
     def is_on(self):
         """Return True if the binary sensor is on."""
-        zones: list[Zone] = self.coordinator.data.Data[self._device_id].Zones
-        for zone in zones:
-            if zone.ZoneId == self._zone.ZoneId:
-                return zone.Status == 2
-        return False
+        if (data := self.coordinator.data) is None:
+            return False
+        zone = data.zones.get(self._zone_id)
+        return zone is not None and self.entity_description.value_fn(zone)
 
     # @property
     # def entity_id(self) -> str:
     def get_unique_id(self) -> str:
-        """Retrieve the sensor unique id."""
-        slug = slugify(self._zone.Name)
-        return f"binary_sensor.inim_{slug}_{self._zone.ZoneId}"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return self._zone.Name
+        """Retrieve the sensor unique id.
+
+        ZoneIds repeat across devices, the device_id keeps them apart.
+        """
+        unique_id = f"binary_sensor.inim_{self._device_id}_{self._zone_id}"
+        if self.entity_description is not ZONE_SENSORS[0]:
+            return f"{unique_id}_{self.entity_description.key}"
+        return unique_id
 
     # @property
     # def extra_state_attributes(self):
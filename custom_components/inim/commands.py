@@ -0,0 +1,152 @@
+"""Serialized scenario activations of an Inim device."""
+
+import asyncio
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+import logging
+from time import monotonic
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import COMMAND_DEDUP_WINDOW, COMMAND_MIN_INTERVAL
+from .hub import InimHub
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandOutcome(StrEnum):
+    """How a scenario activation ended."""
+
+    SENT = "sent"
+    SUPERSEDED = "superseded"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True, slots=True)
+class CommandResult:
+    """Outcome of a scenario activation and the seconds since it was queued."""
+
+    scenario_id: int
+    outcome: CommandOutcome
+    latency: float
+
+
+@dataclass(slots=True)
+class _Command:
+    scenario_id: int
+    queued_at: float
+    future: asyncio.Future[CommandResult] = field(repr=False)
+
+
+class InimCommandQueue:
+    """Send the scenario activations of a device one at a time.
+
+    A command waits COMMAND_DEDUP_WINDOW before being sent: a different
+    scenario queued meanwhile replaces it (last writer wins) and the same
+    scenario shares its result. Two commands are at least
+    COMMAND_MIN_INTERVAL apart. After every command sent `on_sent` is
+    called, i.e. to poll the device faster.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: InimHub,
+        device_id: str,
+        on_sent: Callable[[], None],
+    ) -> None:
+        """Initialize an empty queue."""
+        self.hass = hass
+        self.hub = hub
+        self.device_id = device_id
+        self.outcomes: Counter[CommandOutcome] = Counter()
+        self.last_result: CommandResult | None = None
+        self._on_sent = on_sent
+        self._pending: _Command | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._last_sent = float("-inf")
+
+    async def async_activate_scenario(self, scenario_id: int) -> CommandResult:
+        """Queue the activation of a scenario and wait for its outcome.
+
+        Raises the error of the cloud when the command failed.
+        """
+        if (pending := self._pending) is None or pending.scenario_id != scenario_id:
+            if pending is not None:
+                self._async_finish(pending, CommandOutcome.SUPERSEDED)
+            pending = self._pending = _Command(
+                scenario_id, monotonic(), self.hass.loop.create_future()
+            )
+        if self._worker is None or self._worker.done():
+            self._worker = self.hass.async_create_background_task(
+                self._async_run(), f"inim {self.device_id} commands"
+            )
+        # A cancelled caller must not cancel the command of the others.
+        return await asyncio.shield(pending.future)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Stop the queue, cancelling the commands not sent or still sending."""
+        if self._pending is not None:
+            self._pending.future.cancel()
+            self._pending = None
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _async_run(self) -> None:
+        while (command := self._pending) is not None:
+            delay = (
+                max(
+                    command.queued_at + COMMAND_DEDUP_WINDOW.total_seconds(),
+                    self._last_sent + COMMAND_MIN_INTERVAL.total_seconds(),
+                )
+                - monotonic()
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self._pending is not command:
+                    # Replaced while waiting, the new one starts over.
+                    continue
+            self._pending = None
+            try:
+                await self.hub.get_activate_scenario(
+                    self.device_id, command.scenario_id
+                )
+            except asyncio.CancelledError:
+                # Stopped while sending, its callers must not wait forever.
+                command.future.cancel()
+                raise
+            except Exception as err:  # noqa: BLE001
+                self._async_finish(command, CommandOutcome.FAILED, err)
+            else:
+                self._async_finish(command, CommandOutcome.SENT)
+                self._on_sent()
+            finally:
+                self._last_sent = monotonic()
+
+    @callback
+    def _async_finish(
+        self,
+        command: _Command,
+        outcome: CommandOutcome,
+        err: Exception | None = None,
+    ) -> None:
+        result = CommandResult(
+            command.scenario_id, outcome, monotonic() - command.queued_at
+        )
+        self.outcomes[outcome] += 1
+        self.last_result = result
+        _LOGGER.debug(
+            "Inim %s scenario %s %s after %.3f seconds",
+            self.device_id,
+            command.scenario_id,
+            outcome,
+            result.latency,
+        )
+        if err is not None:
+            command.future.set_exception(err)
+        else:
+            command.future.set_result(result)
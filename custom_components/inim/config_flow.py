@@ -1,8 +1,10 @@
+import asyncio
+from collections.abc import Mapping
 from http.client import HTTPException
 import logging
 from typing import Any, Optional
 
-from pyinim.inim_cloud import InimCloud
+import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries, core
@@ -18,16 +20,44 @@ from homeassistant.const import (
     STATE_ALARM_ARMED_VACATION,
     STATE_ALARM_DISARMED,
 )
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.importlib import async_import_module
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+)
 
 from .const import (
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
     CONF_PANEL_NAME,
     CONF_PANELS,
+    CONF_POLL_STRATEGY,
+    CONF_SCENARIOS,
+    CONF_STATE_PRECEDENCE,
+    CONF_ZONES,
     CONST_ALARM_CONTROL_PANEL_NAME,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_POLL_STRATEGY,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STATE_PRECEDENCE,
     DOMAIN,
+    POLL_STRATEGIES,
+    REQUEST_TIMEOUT,
+)
+from .exceptions import InimConnectionError, InimDeviceNotFoundError, InimError
+from .options import (
+    get_panels,
+    get_scan_interval,
+    get_scan_interval_bounds,
+    get_zones,
 )
+from .session import async_get_session
+from .token_cache import async_get_token_cache
+from .transport import get_device, parse_devices_extended, request_devices_extended
+from .types import Device
 
 UNIQUE_ID_PREFIX = "alarm_control_panel"
 
@@ -81,20 +111,40 @@ AUTH_SCHEMA = vol.Schema(
         vol.Required(CONF_USERNAME): cv.string,
         vol.Required(CONF_PASSWORD): cv.string,
         vol.Required(CONF_CLIENT_ID): cv.string,
-        vol.Required(CONF_DEVICE_ID): cv.string,
+        # Picked out of the account devices when left empty.
+        vol.Optional(CONF_DEVICE_ID): cv.string,
+        vol.Optional(CONF_POLL_STRATEGY, default=DEFAULT_POLL_STRATEGY): vol.In(
+            POLL_STRATEGIES
+        ),
     }
 )
 
+REAUTH_SCHEMA = vol.Schema({vol.Required(CONF_PASSWORD): cv.string})
+
+
+def entry_unique_id(username: str, device_id: str) -> str:
+    """Return the unique_id of the entry of a device of an account.
+
+    The title is not part of it, it can be renamed.
+    """
+    return f"{username.lower()}_{device_id}"
+
 
 def gen_unique_panel_id(s: str) -> str:
     """Generate an unique_id suitable for this integration ."""
     return UNIQUE_ID_PREFIX + "_" + cv.slugify(s)
 
 
-async def validate_panel(name: str) -> None:
-    """Validate a Inim Panel."""
+async def validate_panel(
+    name: str, scenarios: Mapping[str, int], device: Device
+) -> str:
+    """Validate a Inim Panel.
 
-    # TODO: add some validation stuff
+    Raises a ValueError if a scenario is not one of the device.
+    """
+    known = {scenario.ScenarioId for scenario in device.Scenarios}
+    if unknown := set(scenarios.values()) - known:
+        raise ValueError(f"Unknown scenarios {sorted(unknown)}")
     return gen_unique_panel_id(name)
 
 
@@ -103,13 +153,16 @@ async def validate_auth(
     password: str,
     client_id: str,
     hass: core.HomeAssistant,  # or maybe hass: core.HassJob,
-) -> None:
-    """Validate a GitHub access token.
+) -> dict[str, Any]:
+    """Validate the Inim credentials by logging in.
 
-    Raises a ValueError if the auth token is invalid.
+    Return the entry title and the logged-in InimCloud client. Raises a
+    ValueError if the login fails.
     """
-    session = async_get_clientsession(hass)
-    inim = InimCloud(
+    # The flow is loaded with the integration, pyinim only when it is used.
+    inim_cloud = await async_import_module(hass, "pyinim.inim_cloud")
+    session = async_get_session(hass)
+    inim = inim_cloud.InimCloud(
         session,
         name="Inim",
         username=username,
@@ -118,20 +171,47 @@ async def validate_auth(
     )
 
     try:
-        await inim.token()
+        token = await inim.token()
     except Exception as exc:
         # except BadRequest as exc:
         raise ValueError("Something bad happened while validating Auth form") from exc
 
-    return {"title": f"Inim Integration for - {username}"}
+    # Let the entry setup reuse this login.
+    token_cache = await async_get_token_cache(hass)
+    token_cache.async_set(username, client_id, token, inim.expires_at)
+
+    return {"title": f"Inim Integration for - {username}", "client": inim}
+
+
+async def fetch_devices(inim) -> dict[str, Device]:
+    """Return the devices of an account, with their scenarios and zones.
+
+    `inim` is the client validate_auth logged in, a single request returns
+    everything. Raises a ValueError if the cloud does not answer.
+    """
+    try:
+        async with asyncio.timeout(REQUEST_TIMEOUT.total_seconds()):
+            status, _, raw = await request_devices_extended(inim, await inim.token())
+        if status >= 400:
+            raise InimConnectionError(f"Inim cloud answered with HTTP {status}")
+        return parse_devices_extended(raw).Data
+    except (InimError, TimeoutError, aiohttp.ClientError) as exc:
+        raise ValueError("Unable to list the devices of the account") from exc
 
 
 class GithubCustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Github Custom config flow."""
 
     VERSION = 1
+    # 1.2: unique_id out of the username and the device, see entry_unique_id
+    # 1.3: zone unique_ids and devices with the device_id
+    MINOR_VERSION = 3
     data: Optional[dict[str, Any]]
+    options: dict[str, Any]
     _title: str
+    # Devices of the account, fetched once with the login and used by every
+    # following step.
+    _devices: dict[str, Device]
 
     async def async_step_user(self, user_input: Optional[dict[str, Any]] = None):
         """User initiated a flow via the user interface."""
@@ -148,14 +228,8 @@ class GithubCustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except ValueError:
                 errors["base"] = "auth"
             if not errors:
-                # ----------------------------------------------------------------------------
-                # Setting our unique id here just because we have the info at this stage to do that
-                # and it will abort early on in the process if alreay setup.
-                # You can put this in any step however.
-                # ----------------------------------------------------------------------------
-                await self.async_set_unique_id(info.get("title"))
-                self._abort_if_unique_id_configured()
-
+                errors = await self._async_fetch_devices(info["client"], user_input)
+            if not errors:
                 # Set our title variable here for use later
                 self._title = info["title"]
 
@@ -163,23 +237,101 @@ class GithubCustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 self.data = user_input
                 self.data[CONF_SCAN_INTERVAL] = DEFAULT_SCAN_INTERVAL
                 self.data[CONF_PANELS] = []
+                self.options = {}
                 # Return the form of the next step.
-                return await self.async_step_panel()
+                if CONF_DEVICE_ID in user_input:
+                    return await self._async_step_device_chosen()
+                if len(self._devices) == 1:
+                    self.data[CONF_DEVICE_ID] = next(iter(self._devices))
+                    return await self._async_step_device_chosen()
+                return await self.async_step_device()
 
         return self.async_show_form(
             step_id="user", data_schema=AUTH_SCHEMA, errors=errors
         )
 
+    async def _async_fetch_devices(
+        self, inim, user_input: dict[str, Any]
+    ) -> dict[str, str]:
+        """Cache the devices of the account, return the errors."""
+        try:
+            devices = await fetch_devices(inim)
+        except ValueError:
+            return {"base": "cannot_connect"}
+        self._devices = devices
+        device_id = user_input.get(CONF_DEVICE_ID)
+        if not devices or (device_id is not None and device_id not in devices):
+            return {"base": "invalid_device"}
+        return {}
+
+    async def async_step_device(self, user_input: Optional[dict[str, Any]] = None):
+        """Pick one of the devices of the account."""
+        if user_input is not None:
+            self.data[CONF_DEVICE_ID] = user_input[CONF_DEVICE_ID]
+            return await self._async_step_device_chosen()
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_DEVICE_ID): SelectSelector(
+                    SelectSelectorConfig(
+                        options=[
+                            SelectOptionDict(
+                                value=device_id, label=f"{device.Name} ({device_id})"
+                            )
+                            for device_id, device in self._devices.items()
+                        ]
+                    )
+                )
+            }
+        )
+        return self.async_show_form(step_id="device", data_schema=schema)
+
+    async def _async_step_device_chosen(self):
+        # ----------------------------------------------------------------------------
+        # Setting our unique id here just because we have the info at this stage to do that
+        # and it will abort early on in the process if alreay setup.
+        # ----------------------------------------------------------------------------
+        # One entry per device, the entries of an account share a hub.
+        await self.async_set_unique_id(
+            entry_unique_id(self.data[CONF_USERNAME], self.data[CONF_DEVICE_ID])
+        )
+        self._abort_if_unique_id_configured()
+        return await self.async_step_zones()
+
+    async def async_step_zones(self, user_input: Optional[dict[str, Any]] = None):
+        """Pick the zones to create entities for."""
+        zones = {
+            zone.ZoneId: zone.Name
+            for zone in self._devices[self.data[CONF_DEVICE_ID]].Zones
+        }
+        if user_input is not None:
+            included = {int(zone_id) for zone_id in user_input[CONF_ZONES]}
+            # With every zone, the zones added to the panel later show up too.
+            if included != zones.keys():
+                self.options[CONF_ZONES] = sorted(included)
+            return await self.async_step_panel()
+
+        options = [
+            SelectOptionDict(value=str(zone_id), label=name)
+            for zone_id, name in zones.items()
+        ]
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_ZONES, default=[option["value"] for option in options]
+                ): SelectSelector(SelectSelectorConfig(options=options, multiple=True))
+            }
+        )
+        return self.async_show_form(step_id="zones", data_schema=schema)
+
     async def async_step_panel(self, user_input: Optional[dict[str, Any]] = None):
         """Second step in config flow to add a Panel."""
         errors: dict[str, str] = {}
         panel_unique_id = UNIQUE_ID_PREFIX
+        device = self._devices[self.data[CONF_DEVICE_ID]]
         if user_input is not None:
             # Validate the panel.
             try:
-                panel_unique_id = await validate_panel(
-                    user_input[CONF_PANEL_NAME] or CONST_ALARM_CONTROL_PANEL_NAME,
-                )
                 scenarios = {
                     STATE_ALARM_ARMED_AWAY: user_input.get(
                         STATE_ALARM_ARMED_AWAY,
@@ -206,8 +358,13 @@ class GithubCustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     #     DEFAULT_SCENARIOS_SCHEMA[STATE_ALARM_ARMED_CUSTOM_BYPASS],
                     # ),
                 }
+                panel_unique_id = await validate_panel(
+                    user_input[CONF_PANEL_NAME] or CONST_ALARM_CONTROL_PANEL_NAME,
+                    scenarios,
+                    device,
+                )
             except ValueError:
-                errors["base"] = "invalid_panel"
+                errors["base"] = "invalid_scenario"
 
             if not errors:
                 # Input is valid, set data.
@@ -224,19 +381,244 @@ class GithubCustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     return await self.async_step_panel()
 
                 # User is done adding panels, create the config entry.
-                return self.async_create_entry(title="Inim Alarm", data=self.data)
+                return self.async_create_entry(
+                    title="Inim Alarm", data=self.data, options=self.options
+                )
+
+        return self.async_show_form(
+            step_id="panel",
+            data_schema=PANEL_SCHEMA,
+            errors=errors,
+            description_placeholders={
+                CONF_SCENARIOS: ", ".join(
+                    f"{scenario.ScenarioId}: {scenario.Name}"
+                    for scenario in device.Scenarios
+                )
+            },
+        )
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]):
+        """The cloud rejected the credentials of an entry."""
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: Optional[dict[str, Any]] = None
+    ):
+        """Ask for the new password of the account."""
+        errors: dict[str, str] = {}
+        entry = self._get_reauth_entry()
+        if user_input is not None:
+            try:
+                await validate_auth(
+                    entry.data[CONF_USERNAME],
+                    user_input[CONF_PASSWORD],
+                    entry.data[CONF_CLIENT_ID],
+                    self.hass,
+                )
+            except ValueError:
+                errors["base"] = "auth"
+            else:
+                return self.async_update_reload_and_abort(
+                    entry, data_updates={CONF_PASSWORD: user_input[CONF_PASSWORD]}
+                )
 
         return self.async_show_form(
-            step_id="panel", data_schema=PANEL_SCHEMA, errors=errors
+            step_id="reauth_confirm",
+            data_schema=REAUTH_SCHEMA,
+            description_placeholders={CONF_USERNAME: entry.data[CONF_USERNAME]},
+            errors=errors,
         )
 
-    # TODO add OptionsFlowHandler 1/2
-    # @staticmethod
-    # @callback
-    # def async_get_options_flow(config_entry):
-    #     """Get the options flow for this handler."""
-    #     return OptionsFlowHandler(config_entry)
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Change the scan interval, the zones and the panel scenarios.
+
+    The entry is not reloaded, the new options are applied in place.
+    """
 
+    options: dict[str, Any]
+    _panel_index: int
+    # The device as last fetched, for its zones and scenarios.
+    _device: Optional[Device] = None
 
-# TODO add OptionsFlowHandler 2/2
-# class OptionsFlowHandler(config_entries.OptionsFlow):
+    async def async_step_init(self, user_input: Optional[dict[str, Any]] = None):
+        """Pick the scan intervals and the zones to include."""
+        if self.config_entry.state is not config_entries.ConfigEntryState.LOADED:
+            return self.async_abort(reason="not_loaded")
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if not (
+                user_input[CONF_MIN_SCAN_INTERVAL]
+                <= user_input[CONF_SCAN_INTERVAL]
+                <= user_input[CONF_MAX_SCAN_INTERVAL]
+            ):
+                errors["base"] = "scan_interval_bounds"
+            else:
+                self.options = {
+                    CONF_SCAN_INTERVAL: user_input[CONF_SCAN_INTERVAL],
+                    CONF_MIN_SCAN_INTERVAL: user_input[CONF_MIN_SCAN_INTERVAL],
+                    CONF_MAX_SCAN_INTERVAL: user_input[CONF_MAX_SCAN_INTERVAL],
+                    CONF_ZONES: sorted(
+                        int(zone_id) for zone_id in user_input[CONF_ZONES]
+                    ),
+                    CONF_PANELS: [],
+                }
+                self._panel_index = 0
+                return await self.async_step_scenarios()
+
+        try:
+            zones = await self._async_zone_names()
+        except InimDeviceNotFoundError:
+            return self.async_abort(reason="device_not_found")
+        included = get_zones(self.config_entry)
+        min_interval, max_interval = get_scan_interval_bounds(self.config_entry)
+        # The adaptive polling never goes below DEFAULT_MIN_SCAN_INTERVAL.
+        interval = vol.All(vol.Coerce(int), vol.Range(min=DEFAULT_MIN_SCAN_INTERVAL))
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_SCAN_INTERVAL,
+                    default=int(get_scan_interval(self.config_entry).total_seconds()),
+                ): interval,
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL, default=int(min_interval.total_seconds())
+                ): interval,
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL, default=int(max_interval.total_seconds())
+                ): interval,
+                vol.Required(
+                    CONF_ZONES,
+                    default=[
+                        str(zone_id)
+                        for zone_id in zones
+                        if included is None or zone_id in included
+                    ],
+                ): SelectSelector(
+                    SelectSelectorConfig(
+                        options=[
+                            SelectOptionDict(value=str(zone_id), label=name)
+                            for zone_id, name in zones.items()
+                        ],
+                        multiple=True,
+                    )
+                ),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+    async def async_step_scenarios(self, user_input: Optional[dict[str, Any]] = None):
+        """Change the scenarios of every panel, one form per panel.
+
+        The scenarios are checked against the device, as in the config flow.
+        The state precedence is every state once, comma separated.
+        """
+        panels = get_panels(self.config_entry)
+        errors: dict[str, str] = {}
+        try:
+            device = self._device or await self._async_fetch_device()
+        except InimDeviceNotFoundError:
+            return self.async_abort(reason="device_not_found")
+        if user_input is not None:
+            panel = panels[self._panel_index]
+            scenarios = {**panel[CONF_SCENARIOS], **user_input}
+            precedence = [
+                state.strip()
+                for state in scenarios.pop(CONF_STATE_PRECEDENCE).split(",")
+            ]
+            try:
+                if sorted(precedence) != sorted(DEFAULT_STATE_PRECEDENCE):
+                    errors["base"] = "invalid_precedence"
+                elif device is None:
+                    errors["base"] = "cannot_connect"
+                else:
+                    await validate_panel(panel[CONF_PANEL_NAME], scenarios, device)
+            except ValueError:
+                errors["base"] = "invalid_scenario"
+            if not errors:
+                self.options[CONF_PANELS].append(
+                    {
+                        **panel,
+                        CONF_SCENARIOS: scenarios,
+                        CONF_STATE_PRECEDENCE: precedence,
+                    }
+                )
+                self._panel_index += 1
+        if self._panel_index >= len(panels):
+            return self.async_create_entry(data=self.options)
+
+        panel = panels[self._panel_index]
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    state, default=panel[CONF_SCENARIOS].get(state, default)
+                ): cv.positive_int
+                for state, default in DEFAULT_SCENARIOS_SCHEMA.items()
+            }
+        ).extend(
+            {
+                vol.Required(
+                    CONF_STATE_PRECEDENCE,
+                    default=", ".join(
+                        panel.get(CONF_STATE_PRECEDENCE, DEFAULT_STATE_PRECEDENCE)
+                    ),
+                ): cv.string
+            }
+        )
+        return self.async_show_form(
+            step_id="scenarios",
+            data_schema=schema,
+            errors=errors,
+            description_placeholders={
+                CONF_PANEL_NAME: panel[CONF_PANEL_NAME],
+                CONF_SCENARIOS: (
+                    ", ".join(
+                        f"{scenario.ScenarioId}: {scenario.Name}"
+                        for scenario in device.Scenarios
+                    )
+                    if device is not None
+                    else "-"
+                ),
+            },
+        )
+
+    async def _async_fetch_device(self) -> Optional[Device]:
+        """Fetch the device, None if the request fails.
+
+        Raises InimDeviceNotFoundError if the account no longer has it.
+        """
+        coordinator = self.hass.data[DOMAIN][self.config_entry.entry_id].coordinator
+        try:
+            _, _, res = await coordinator.hub.get_devices_extended(
+                coordinator.device_id
+            )
+        except InimError:
+            return None
+        self._device = get_device(res, coordinator.device_id)
+        return self._device
+
+    async def _async_zone_names(self) -> dict[int, str]:
+        """Return the name of every zone of the device, by ZoneId.
+
+        The coordinator only indexes the included zones, so the names come
+        from a fresh request, or from the last snapshot if it fails.
+        """
+        if (device := await self._async_fetch_device()) is None:
+            data = self.hass.data[DOMAIN][self.config_entry.entry_id].coordinator.data
+            return {
+                zone_id: (
+                    data.zones[zone_id].name
+                    if zone_id in data.zones
+                    else f"Zone {zone_id}"
+                )
+                for zone_id in sorted(data.zone_ids)
+            }
+        return {
+            zone.ZoneId: zone.Name
+            for zone in sorted(device.Zones, key=lambda zone: zone.ZoneId)
+        }
@@ -4,16 +4,117 @@ from datetime import timedelta
 from typing import Final
 
 DOMAIN = "inim"
+# hass.data key of the InimHub instances, one per account
+DATA_HUBS = f"{DOMAIN}_hubs"
+# hass.data key of the InimSession of the cloud requests
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_TOKEN_CACHE = f"{DOMAIN}_token_cache"
+
+TOKEN_STORAGE_KEY: Final = f"{DOMAIN}.tokens"
+TOKEN_STORAGE_VERSION: Final = 1
+# Login again this long before the token expires
+TOKEN_REFRESH_MARGIN = timedelta(days=1)
+# Wait this long before retrying a failed background login
+TOKEN_REFRESH_RETRY = timedelta(minutes=5)
+
+# Last good snapshot of every entry, see snapshot_cache.py, written at most
+# once every SNAPSHOT_SAVE_DELAY seconds
+SNAPSHOT_STORAGE_KEY: Final = f"{DOMAIN}.snapshot"
+SNAPSHOT_STORAGE_VERSION: Final = 1
+SNAPSHOT_SAVE_DELAY = 10
 
 CONF_CLIENT_ID: Final = "client_id"
 CONF_DEVICE_ID: Final = "device_id"
 CONF_SCENARIOS: Final = "scenarios"
+CONF_ZONES: Final = "zones"
 CONF_PANELS: Final = "panels"
 CONF_PANEL_NAME: Final = "panel_name"
+CONF_STATE_PRECEDENCE: Final = "state_precedence"
+CONF_MIN_SCAN_INTERVAL: Final = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL: Final = "max_scan_interval"
+CONF_POLL_STRATEGY: Final = "poll_strategy"
 CONST_ALARM_CONTROL_PANEL_NAME: Final = "Alarm Panel"
 
+# When several states of a panel share a scenario (by default away and
+# vacation), or several mapped scenarios are active, the first state of its
+# CONF_STATE_PRECEDENCE wins, this one by default.
+DEFAULT_STATE_PRECEDENCE: Final = [
+    "armed_away",
+    "disarmed",
+    "armed_night",
+    "armed_home",
+    "armed_vacation",
+]
+
+# Coordinator context used by the entities that depend on ActiveScenarios,
+# zone entities use their ZoneId.
+SCENARIOS_CONTEXT: Final = "active_scenarios"
+
 # CONNECTION: Final = "connection"
 
 # from homeassistant.components.binary_sensor import (SCAN_INTERVAL as DEFAULT_SCAN_INTERVAL)
 # DEFAULT_SCAN_INTERVAL = timedelta(seconds=15)
 DEFAULT_SCAN_INTERVAL = 30
+# Bounds of the adaptive polling, see polling.py. No interval of the options
+# can go below the default minimum.
+DEFAULT_MIN_SCAN_INTERVAL = 10
+DEFAULT_MAX_SCAN_INTERVAL = 120
+# How long to keep polling at the minimum interval after some activity
+FAST_POLL_PERIOD = timedelta(minutes=2)
+
+# Refresh this often after an arm/disarm command, until the requested
+# scenario shows up in ActiveScenarios or CONFIRM_TIMEOUT elapses
+CONFIRM_INTERVAL = timedelta(seconds=2)
+CONFIRM_TIMEOUT = timedelta(seconds=30)
+
+# Samples kept by the rolling measures of metrics.py
+METRICS_WINDOW = 100
+
+# Scenario activations of a device, see commands.py: a command waits
+# COMMAND_DEDUP_WINDOW for a newer one to replace it, and two commands are
+# sent at least COMMAND_MIN_INTERVAL apart
+COMMAND_DEDUP_WINDOW = timedelta(milliseconds=500)
+COMMAND_MIN_INTERVAL = timedelta(seconds=1)
+
+# Zone and scenario transitions kept per device, see history.py, and
+# longest wait before the new ones are fired as one EVENT_TRANSITIONS event
+HISTORY_SIZE = 500
+HISTORY_FLUSH_DELAY = timedelta(seconds=2)
+EVENT_TRANSITIONS: Final = f"{DOMAIN}_transitions"
+SERVICE_GET_HISTORY: Final = "get_history"
+
+# How a refresh combines RequestPoll and GetDevicesExtended:
+# - sequential: RequestPoll then GetDevicesExtended, two round trips
+# - pipelined: both requests at once, a single round trip
+#   the read does not wait for the refresh of the panel, so the states
+#   are those of the previous RequestPoll: one update interval behind
+# - skip_recent: RequestPoll only when the last one is older than
+#   REQUEST_POLL_MAX_AGE, otherwise GetDevicesExtended alone
+POLL_STRATEGY_SEQUENTIAL: Final = "sequential"
+POLL_STRATEGY_PIPELINED: Final = "pipelined"
+POLL_STRATEGY_SKIP_RECENT: Final = "skip_recent"
+POLL_STRATEGIES: Final = [
+    POLL_STRATEGY_SEQUENTIAL,
+    POLL_STRATEGY_PIPELINED,
+    POLL_STRATEGY_SKIP_RECENT,
+]
+DEFAULT_POLL_STRATEGY = POLL_STRATEGY_SEQUENTIAL
+REQUEST_POLL_MAX_AGE = timedelta(seconds=60)
+
+# Longest wait for a single cloud request
+REQUEST_TIMEOUT = timedelta(seconds=10)
+# The session of the cloud requests, see session.py: the connections kept
+# open to the Inim API host, for how long between two requests, how long a
+# resolved address is reused and the longest wait for a new connection
+CLOUD_CONNECTIONS = 4
+CLOUD_KEEPALIVE_TIMEOUT = timedelta(minutes=2)
+CLOUD_DNS_CACHE_TTL = timedelta(minutes=10)
+CLOUD_CONNECT_TIMEOUT = timedelta(seconds=5)
+# Attempts of a refresh before it fails, the n-th retry waits about
+# FETCH_RETRY_BACKOFF * 2 ** (n - 1), with a random jitter of +-50%
+FETCH_ATTEMPTS = 3
+FETCH_RETRY_BACKOFF = timedelta(seconds=1)
+# Failed refreshes in a row that open the circuit breaker, and how long it
+# stays open before a single trial request is let through
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_OPEN_TIME = timedelta(minutes=5)
@@ -0,0 +1,449 @@
+"""DataUpdateCoordinator for the Inim integration."""
+
+import asyncio
+from collections.abc import Awaitable, Container
+from dataclasses import astuple, dataclass
+from datetime import datetime, timedelta
+import logging
+import random
+from time import monotonic
+from typing import TypeVar
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .commands import InimCommandQueue
+from .const import (
+    DOMAIN,
+    FETCH_ATTEMPTS,
+    FETCH_RETRY_BACKOFF,
+    POLL_STRATEGY_PIPELINED,
+    POLL_STRATEGY_SKIP_RECENT,
+    REQUEST_POLL_MAX_AGE,
+    SCENARIOS_CONTEXT,
+)
+from .exceptions import InimApiError, InimAuthError, InimError
+from .history import InimHistory, InimTransition
+from .hub import InimHub
+from .metrics import InimMetrics
+from .polling import AdaptivePollPolicy, CircuitBreaker
+from .snapshot_cache import CachedSnapshot, InimSnapshotCache
+from .transport import get_device
+from .types import InimResult, ZoneSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# ZoneSnapshot fields whose changes are recorded in the history.
+HISTORY_FIELDS = ("status", "alarm_memory", "tamper_memory", "bypassed")
+
+
+@dataclass(frozen=True, slots=True)
+class InimData:
+    """Snapshot of an Inim device, indexed once per poll.
+
+    Only the compact zone records and the parsed scenarios are kept, the
+    pyinim payload is dropped once they are built. `zones` may only hold
+    the zones some entity listens to, `zone_ids` has every zone of the
+    device.
+    """
+
+    zones: dict[int, ZoneSnapshot]
+    active_scenarios: frozenset[int]
+    zone_ids: frozenset[int]
+
+    @classmethod
+    def from_result(
+        cls,
+        result: InimResult,
+        device_id: str,
+        wanted: Container[int] | None = None,
+        known: Container[int] = frozenset(),
+    ) -> "InimData":
+        """Build the lookup tables out of a `get_devices_extended` result.
+
+        With `wanted`, only those zones and the ones not in `known` yet get
+        a ZoneSnapshot. Raises InimDeviceNotFoundError if the account does
+        not have the device.
+        """
+        device = get_device(result, device_id)
+        zone_ids = frozenset(zone.ZoneId for zone in device.Zones)
+        return cls(
+            zones={
+                zone.ZoneId: ZoneSnapshot.from_zone(zone)
+                for zone in device.Zones
+                if wanted is None or zone.ZoneId in wanted or zone.ZoneId not in known
+            },
+            active_scenarios=frozenset(
+                int(x) for x in device.ActiveScenarios.split(",") if x
+            ),
+            zone_ids=zone_ids,
+        )
+
+    @classmethod
+    def from_cached(cls, cached: CachedSnapshot) -> "InimData":
+        """Rebuild a snapshot saved by the snapshot cache."""
+        zones = (ZoneSnapshot(*row) for row in cached["zones"])
+        indexed = {zone.zone_id: zone for zone in zones}
+        return cls(
+            zones=indexed,
+            active_scenarios=frozenset(cached["active_scenarios"]),
+            zone_ids=frozenset(indexed),
+        )
+
+    def as_cached(self) -> CachedSnapshot:
+        """Return the compact form the snapshot cache saves."""
+        return CachedSnapshot(
+            zones=[list(astuple(zone)) for zone in self.zones.values()],
+            active_scenarios=sorted(self.active_scenarios),
+        )
+
+    def changed_contexts(self, previous: "InimData") -> set[object]:
+        """Return the coordinator contexts whose data differs from `previous`.
+
+        Zones are keyed by their ZoneId, shared by every entity of the zone,
+        the scenarios by SCENARIOS_CONTEXT.
+        """
+        changed: set[object] = {
+            zone_id
+            for zone_id, zone in self.zones.items()
+            if previous.zones.get(zone_id) != zone
+        }
+        changed.update(previous.zones.keys() - self.zone_ids)
+        if previous.active_scenarios != self.active_scenarios:
+            changed.add(SCENARIOS_CONTEXT)
+        return changed
+
+    def transitions(
+        self, previous: "InimData", changed: set[object], time: datetime
+    ) -> list[InimTransition]:
+        """Return the transitions between `previous` and this snapshot.
+
+        Only the `changed` contexts are compared. A zone that tripped and
+        restored between two polls still shows up, as its alarm memory.
+        """
+        transitions = []
+        for context in changed:
+            if context == SCENARIOS_CONTEXT:
+                transitions.append(
+                    InimTransition(
+                        time,
+                        None,
+                        None,
+                        SCENARIOS_CONTEXT,
+                        sorted(previous.active_scenarios),
+                        sorted(self.active_scenarios),
+                    )
+                )
+            elif (old := previous.zones.get(context)) is not None and (
+                new := self.zones.get(context)
+            ) is not None:
+                transitions.extend(
+                    InimTransition(
+                        time,
+                        new.zone_id,
+                        new.name,
+                        field,
+                        getattr(old, field),
+                        getattr(new, field),
+                    )
+                    for field in HISTORY_FIELDS
+                    if getattr(old, field) != getattr(new, field)
+                )
+        return transitions
+
+
+class InimCoordinator(DataUpdateCoordinator[InimData]):
+    """Fetch the Inim cloud and pre-process it into lookup tables.
+
+    A refresh is retried with a jittered exponential backoff. Rejected
+    credentials raise ConfigEntryAuthFailed, which starts a reauth, the
+    other errors UpdateFailed. After repeated failures the circuit breaker
+    stops the requests for a while; `data` keeps the last good snapshot
+    meanwhile.
+
+    Every changed snapshot is saved to the snapshot cache, the next startup
+    begins from it, `stale` until the first live refresh. What changed is
+    also recorded in `history`.
+
+    The coordinators of the devices of an account share their refreshes
+    through the hub: whichever polls first refreshes every device, and the
+    others take its result and restart their interval. The poll strategy
+    of that coordinator applies.
+    """
+
+    config_entry: ConfigEntry
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        hub: InimHub,
+        device_id: str,
+        poll_policy: AdaptivePollPolicy,
+        poll_strategy: str,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            # Name of the data. For logging purposes.
+            name=DOMAIN,
+            # Polling interval. Will only be polled if there are subscribers.
+            update_interval=poll_policy.interval,
+        )
+        self.hub = hub
+        self.device_id = device_id
+        self.poll_policy = poll_policy
+        self.poll_strategy = poll_strategy
+        self.circuit = CircuitBreaker()
+        # Scenario activations, polling faster after each one.
+        self.commands = InimCommandQueue(hass, hub, device_id, self.async_poll_fast)
+        self.snapshot_cache = InimSnapshotCache(hass, config_entry.entry_id)
+        self.history = InimHistory(hass, device_id)
+        # Whether `data` comes from the snapshot cache and not from the cloud.
+        self.stale = False
+        # Seconds the polls waited for each cloud method, refresh failures,
+        # zones changed per poll and seconds spent updating the entities.
+        self.metrics = InimMetrics()
+        self._last_request_poll: float | None = None
+        # Last result indexed, fetched or handed over by the hub.
+        self._last_result: InimResult | None = None
+        # Contexts to notify on the next async_update_listeners, None means all.
+        self._changed_contexts: set[object] | None = None
+        # Index every zone on the next refresh, see async_reindex.
+        self._index_all = False
+
+    async def _async_update_data(self) -> InimData:
+        """Fetch the device and index its zones by ZoneId.
+
+        Entities only do dict lookups afterwards, so the cost of a refresh
+        stays linear in the number of zones.
+        """
+        self._changed_contexts = None
+        if self.circuit.is_open:
+            self.update_interval = self.poll_policy.failure()
+            raise UpdateFailed("Inim cloud unavailable, waiting before retrying")
+
+        # A trial refresh of a half open circuit gets a single attempt.
+        attempts = 1 if self.circuit.half_open else FETCH_ATTEMPTS
+        try:
+            res = await self._async_fetch_with_retry(attempts)
+            if res is self._last_result:
+                # Already handed over by the hub, out of the same request.
+                self._changed_contexts = set()
+                return self.data
+            # Not retried, the device is missing from a valid answer.
+            data = self._async_index(res)
+        except InimAuthError as err:
+            self.metrics.counters["refresh_failures"] += 1
+            self.update_interval = self.poll_policy.failure()
+            raise ConfigEntryAuthFailed(str(err)) from err
+        except InimError as err:
+            self.metrics.counters["refresh_failures"] += 1
+            self.circuit.failure()
+            self.update_interval = self.poll_policy.failure()
+            raise UpdateFailed(str(err)) from err
+
+        self._async_refreshed(res, data)
+        self.hub.async_share(res, self.device_id)
+        return data
+
+    @callback
+    def async_set_shared_result(self, result: InimResult) -> None:
+        """Take the refresh of another coordinator of the account.
+
+        It sent RequestPoll for this device too, so it counts as a refresh
+        of this one, and the next one is scheduled from now.
+        """
+        if result is self._last_result:
+            return
+        try:
+            data = self._async_index(result)
+        except InimError:
+            # The own refresh reports the missing device.
+            return
+        self._changed_contexts = None
+        self._async_refreshed(result, data)
+        self.async_set_updated_data(data)
+
+    @callback
+    def _async_refreshed(self, result: InimResult, data: InimData) -> None:
+        """Account a successful refresh, before `data` replaces the previous one."""
+        self._last_result = result
+        self.circuit.success()
+        if self.last_update_success and self.data is not None and not self.stale:
+            self._changed_contexts = data.changed_contexts(self.data)
+        self.update_interval = self.poll_policy.success(bool(self._changed_contexts))
+        self._async_snapshot_updated(data, self._changed_contexts)
+
+    async def async_load_snapshot(self) -> bool:
+        """Start from the cached snapshot, return False if there is none."""
+        if (cached := await self.snapshot_cache.async_load()) is None:
+            return False
+        self.data = InimData.from_cached(cached)
+        self.stale = True
+        return True
+
+    @callback
+    def _async_snapshot_updated(
+        self, data: InimData, changed: set[object] | None
+    ) -> None:
+        """Record and save a live snapshot that differs from the previous one.
+
+        Called before `data` is replaced, it still holds the previous one.
+        """
+        self.stale = False
+        if changed is not None:
+            self.metrics.add("zones_changed", len(changed - {SCENARIOS_CONTEXT}))
+            if changed:
+                self.history.async_record(
+                    data.transitions(self.data, changed, dt_util.utcnow())
+                )
+        if changed is None or changed:
+            self.snapshot_cache.async_save(data.as_cached())
+
+    @callback
+    def _async_index(self, result: InimResult) -> InimData:
+        """Index the zones some entity listens to, and the new ones.
+
+        Before any entity subscribed, i.e. on the first refresh, or after
+        async_reindex, every zone is indexed.
+        """
+        if not self._listeners or self._index_all:
+            self._index_all = False
+            return InimData.from_result(result, self.device_id)
+        return InimData.from_result(
+            result,
+            self.device_id,
+            wanted={
+                context for context in self.async_contexts() if type(context) is int
+            },
+            known=self.data.zone_ids if self.data is not None else frozenset(),
+        )
+
+    async def _async_fetch_with_retry(self, attempts: int) -> InimResult:
+        """Run _async_fetch, retrying the errors that are not about auth."""
+        attempt = 1
+        while True:
+            try:
+                return await self._async_fetch()
+            except InimAuthError:
+                raise
+            except InimError as err:
+                if attempt >= attempts:
+                    raise
+                if isinstance(err, InimApiError):
+                    # Most likely a revoked token, log in again on the retry.
+                    await self.hub.async_invalidate_token()
+                delay = (
+                    FETCH_RETRY_BACKOFF.total_seconds()
+                    * 2 ** (attempt - 1)
+                    * random.uniform(0.5, 1.5)
+                )
+                _LOGGER.debug("Inim refresh failed (%s), retrying in %.1fs", err, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _async_fetch(self) -> InimResult:
+        """Run RequestPoll and GetDevicesExtended as the poll strategy says.
+
+        RequestPoll goes to every device of the account, the answer of
+        GetDevicesExtended serves all of them.
+        """
+        api = self.hub
+        if self.poll_strategy == POLL_STRATEGY_PIPELINED:
+            # The snapshot is the one of the previous RequestPoll.
+            _, (_, _, res) = await asyncio.gather(
+                self._async_timed("get_request_poll", self._async_request_poll()),
+                self._async_timed(
+                    "get_devices_extended", api.get_devices_extended(self.device_id)
+                ),
+            )
+            return res
+
+        if (
+            self.poll_strategy != POLL_STRATEGY_SKIP_RECENT
+            or self._last_request_poll is None
+            or monotonic() - self._last_request_poll
+            >= REQUEST_POLL_MAX_AGE.total_seconds()
+        ):
+            await self._async_timed("get_request_poll", self._async_request_poll())
+            self._last_request_poll = monotonic()
+        _, _, res = await self._async_timed(
+            "get_devices_extended", api.get_devices_extended(self.device_id)
+        )
+        return res
+
+    async def _async_request_poll(self) -> None:
+        """Send RequestPoll to every device of the account."""
+        await asyncio.gather(
+            *(
+                self.hub.get_request_poll(device_id)
+                for device_id in self.hub.device_ids | {self.device_id}
+            )
+        )
+
+    async def _async_timed(self, name: str, call: Awaitable[_T]) -> _T:
+        """Await a cloud call and record how long it took."""
+        start = monotonic()
+        try:
+            return await call
+        finally:
+            elapsed = monotonic() - start
+            self.metrics.add(name, elapsed)
+            _LOGGER.debug("Inim %s took %.3f seconds", name, elapsed)
+
+    async def async_reindex(self) -> None:
+        """Refresh, indexing the zones no entity listened to as well.
+
+        Used when zones are included again, to create their entities.
+        """
+        self._index_all = True
+        await self.async_refresh()
+
+    @callback
+    def async_set_scan_interval(
+        self, interval: timedelta, min_interval: timedelta, max_interval: timedelta
+    ) -> None:
+        """Change the poll intervals, taking effect right away."""
+        self.update_interval = self.poll_policy.set_interval(
+            interval, min_interval, max_interval
+        )
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_poll_fast(self) -> None:
+        """Poll at the minimum interval for a while, i.e. after a command."""
+        self.update_interval = self.poll_policy.activity()
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the queued commands and fire the pending history too."""
+        self.commands.async_cancel()
+        self.history.async_close()
+        await super().async_shutdown()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update only the listeners whose context changed since the last poll.
+
+        Listeners without a context, availability changes and the first
+        snapshot still reach every entity.
+        """
+        start = monotonic()
+        changed, self._changed_contexts = self._changed_contexts, None
+        if changed is None or not self.last_update_success:
+            super().async_update_listeners()
+        else:
+            for update_callback, context in list(self._listeners.values()):
+                if context is None or context in changed:
+                    update_callback()
+        self.metrics.add("update_listeners", monotonic() - start)
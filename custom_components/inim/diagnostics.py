@@ -0,0 +1,44 @@
+"""Diagnostics of the Inim integration."""
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_CLIENT_ID, CONF_DEVICE_ID, DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_CLIENT_ID, CONF_DEVICE_ID}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the settings, the poll state and the metrics of an entry."""
+    runtime_data = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = runtime_data.coordinator
+    last_command = coordinator.commands.last_result
+    return {
+        "entry": async_redact_data(dict(config_entry.data), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "poll_strategy": coordinator.poll_strategy,
+            "stale": coordinator.stale,
+            "circuit_failures": coordinator.circuit.failures,
+            "circuit_open": coordinator.circuit.is_open,
+            "zones": len(coordinator.data.zone_ids) if coordinator.data else 0,
+            "zones_indexed": len(coordinator.data.zones) if coordinator.data else 0,
+            "metrics": coordinator.metrics.as_dict(),
+        },
+        "commands": {
+            "outcomes": dict(coordinator.commands.outcomes),
+            "last_result": asdict(last_command) if last_command else None,
+        },
+        "hub": {
+            "entries": len(runtime_data.hub.entry_ids),
+            "metrics": runtime_data.hub.metrics.as_dict(),
+        },
+    }
@@ -0,0 +1,22 @@
+"""Base entity of the Inim integration."""
+
+from typing import Any
+
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import InimCoordinator
+
+
+class InimEntity(CoordinatorEntity[InimCoordinator]):
+    """An entity fed by the Inim coordinator.
+
+    Right after startup the coordinator may only have the cached snapshot,
+    the entity then has a `stale` attribute until the first live refresh.
+    If that refresh fails the entity is unavailable, like after any failed
+    refresh: an old state must not pass for the current one.
+    """
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag the states read from the cached snapshot."""
+        return {"stale": True} if self.coordinator.stale else None
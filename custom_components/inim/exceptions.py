@@ -0,0 +1,23 @@
+"""Errors raised by the Inim cloud client."""
+
+from homeassistant.exceptions import HomeAssistantError
+
+
+class InimError(HomeAssistantError):
+    """Base class of the Inim cloud errors."""
+
+
+class InimAuthError(InimError):
+    """The cloud rejected the credentials, only a reauth can fix it."""
+
+
+class InimConnectionError(InimError):
+    """The cloud could not be reached or answered garbage, worth a retry."""
+
+
+class InimApiError(InimConnectionError):
+    """The cloud answered with an error status, i.e. for a revoked token."""
+
+
+class InimDeviceNotFoundError(InimApiError):
+    """The account has no such device, i.e. it was removed or unshared."""
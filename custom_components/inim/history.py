@@ -0,0 +1,100 @@
+"""Zone and scenario transitions of an Inim device, kept in a ring buffer."""
+
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import EVENT_TRANSITIONS, HISTORY_FLUSH_DELAY, HISTORY_SIZE
+
+
+@dataclass(frozen=True, slots=True)
+class InimTransition:
+    """One field of a zone, or the active scenarios, changing value.
+
+    `zone_id` and `name` are None for the scenarios.
+    """
+
+    time: datetime
+    zone_id: int | None
+    name: str | None
+    field: str
+    old: Any
+    new: Any
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the transition as event and service data."""
+        return {
+            "time": self.time.isoformat(),
+            "zone_id": self.zone_id,
+            "name": self.name,
+            "field": self.field,
+            "old": self.old,
+            "new": self.new,
+        }
+
+
+class InimHistory:
+    """The last HISTORY_SIZE transitions of a device.
+
+    New transitions are also fired on the bus as a single EVENT_TRANSITIONS
+    event every HISTORY_FLUSH_DELAY seconds at most, so a poll that changed
+    many zones costs the recorder one row and the logbook one entry.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, device_id: str, size: int = HISTORY_SIZE
+    ) -> None:
+        """Initialize an empty history."""
+        self.hass = hass
+        self.device_id = device_id
+        self.transitions: deque[InimTransition] = deque(maxlen=size)
+        self._pending: list[InimTransition] = []
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_record(self, transitions: Iterable[InimTransition]) -> None:
+        """Add transitions, firing them with the next batch."""
+        transitions = list(transitions)
+        if not transitions:
+            return
+        self.transitions.extend(transitions)
+        self._pending.extend(transitions)
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass,
+                HISTORY_FLUSH_DELAY.total_seconds(),
+                HassJob(self._async_flush, cancel_on_shutdown=True),
+            )
+
+    @callback
+    def async_latest(self, limit: int | None = None) -> list[InimTransition]:
+        """Return the last `limit` transitions, oldest first."""
+        if limit is None or limit >= len(self.transitions):
+            return list(self.transitions)
+        return list(self.transitions)[-limit:]
+
+    @callback
+    def _async_flush(self, _now: datetime | None = None) -> None:
+        """Fire the pending transitions as one event."""
+        self._unsub_flush = None
+        pending, self._pending = self._pending, []
+        if pending:
+            self.hass.bus.async_fire(
+                EVENT_TRANSITIONS,
+                {
+                    "device_id": self.device_id,
+                    "transitions": [transition.as_dict() for transition in pending],
+                },
+            )
+
+    @callback
+    def async_close(self) -> None:
+        """Fire what is still pending and stop the batching timer."""
+        if self._unsub_flush:
+            self._unsub_flush()
+        self._async_flush()
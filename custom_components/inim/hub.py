@@ -0,0 +1,309 @@
+"""Inim cloud session shared by the config entries of the same account."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from datetime import datetime
+import logging
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import aiohttp
+from pyinim.cloud.exceptions import MalformedResponseError
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.importlib import async_import_module
+
+from .const import (
+    DATA_HUBS,
+    REQUEST_TIMEOUT,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_REFRESH_RETRY,
+)
+from .exceptions import InimAuthError, InimConnectionError
+from .metrics import InimMetrics
+from .session import async_get_session, async_release_session
+from .token_cache import InimTokenCache, async_get_token_cache
+from .transport import parse_devices_extended, request_devices_extended
+from .types import InimResult
+
+if TYPE_CHECKING:
+    from pyinim.inim_cloud import InimCloud
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class InimHub:
+    """One InimCloud client and token for every device of an account.
+
+    GetDevicesExtended returns all the devices of the account. A refresh
+    sends RequestPoll for every subscribed device, then a single
+    GetDevicesExtended, and async_share hands the result to the coordinators
+    of the other devices, which take it as their own refresh. Concurrent
+    calls for the same request share the one already in flight.
+
+    The token is kept in the token cache and renewed in the background
+    before it expires, so polls and restarts do not pay for a login.
+
+    Every request is bounded by REQUEST_TIMEOUT. Rejected credentials raise
+    InimAuthError, everything else that went wrong InimConnectionError.
+    `metrics` measures the requests actually sent, their failures and the
+    GetDevicesExtended payload size.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        inim_cloud_api: "InimCloud",
+        token_cache: InimTokenCache,
+        username: str,
+        client_id: str,
+    ) -> None:
+        """Initialize the hub, reusing the cached token if any."""
+        self.hass = hass
+        self.inim_cloud_api = inim_cloud_api
+        self.entry_ids: set[str] = set()
+        self.metrics = InimMetrics()
+        self._token_cache = token_cache
+        self._username = username
+        self._client_id = client_id
+        self._in_flight: dict[Hashable, asyncio.Future[Any]] = {}
+        # Coordinators of the account, by device_id.
+        self._subscribers: dict[str, Callable[[InimResult], None]] = {}
+        self._token_lock = asyncio.Lock()
+        self._unsub_token_refresh: CALLBACK_TYPE | None = None
+
+        if cached := token_cache.get(username, client_id):
+            # InimCloud.token() only logs in when expires_at is in the past.
+            inim_cloud_api._token = cached["token"]  # noqa: SLF001
+            inim_cloud_api.expires_at = cached["expires_at"]
+            self._async_schedule_token_refresh()
+
+    async def token(self) -> str:
+        """Return the account token, logging in once for concurrent callers."""
+        async with self._token_lock:
+            return await self._async_token()
+
+    async def async_invalidate_token(self) -> None:
+        """Drop the token, the next request logs in again."""
+        async with self._token_lock:
+            self.inim_cloud_api.expires_at = 0
+
+    async def _async_token(self) -> str:
+        api = self.inim_cloud_api
+        expires_at = api.expires_at
+        token = await self._async_request("token", api.token())
+        if api.expires_at != expires_at:
+            self._token_cache.async_set(
+                self._username, self._client_id, token, api.expires_at
+            )
+            self._async_schedule_token_refresh()
+        return token
+
+    @callback
+    def _async_schedule_token_refresh(self, delay: float | None = None) -> None:
+        if self._unsub_token_refresh:
+            self._unsub_token_refresh()
+        if delay is None:
+            delay = (
+                self.inim_cloud_api.expires_at
+                - TOKEN_REFRESH_MARGIN.total_seconds()
+                - time()
+            )
+        self._unsub_token_refresh = async_call_later(
+            self.hass,
+            max(delay, 0),
+            HassJob(self._async_refresh_token, cancel_on_shutdown=True),
+        )
+
+    async def _async_refresh_token(self, _now: datetime) -> None:
+        """Log in again ahead of the token expiry."""
+        self._unsub_token_refresh = None
+        async with self._token_lock:
+            expires_at = self.inim_cloud_api.expires_at
+            self.inim_cloud_api.expires_at = 0
+            try:
+                await self._async_token()
+            except Exception:  # noqa: BLE001
+                _LOGGER.warning("Unable to renew the Inim token, retrying later")
+                self.inim_cloud_api.expires_at = expires_at
+                self._async_schedule_token_refresh(TOKEN_REFRESH_RETRY.total_seconds())
+
+    @callback
+    def async_close(self) -> None:
+        """Stop the background token renewal."""
+        if self._unsub_token_refresh:
+            self._unsub_token_refresh()
+            self._unsub_token_refresh = None
+
+    @property
+    def device_ids(self) -> set[str]:
+        """Return the devices of the account some coordinator polls."""
+        return set(self._subscribers)
+
+    @callback
+    def async_subscribe(
+        self, device_id: str, update_callback: Callable[[InimResult], None]
+    ) -> CALLBACK_TYPE:
+        """Get the results fetched by the coordinators of the other devices."""
+        self._subscribers[device_id] = update_callback
+
+        @callback
+        def _async_unsubscribe() -> None:
+            self._subscribers.pop(device_id, None)
+
+        return _async_unsubscribe
+
+    @callback
+    def async_share(self, result: InimResult, device_id: str) -> None:
+        """Hand a refresh of `device_id` to the coordinators of the others."""
+        for other_id, update_callback in list(self._subscribers.items()):
+            if other_id != device_id:
+                update_callback(result)
+
+    async def get_request_poll(
+        self, device_id: str
+    ) -> tuple[int, Mapping[str, str], None]:
+        """Ask the cloud to poll a device."""
+        return await self._async_coalesce(
+            ("get_request_poll", device_id),
+            lambda: self._async_call(self.inim_cloud_api.get_request_poll, device_id),
+        )
+
+    async def get_devices_extended(
+        self, device_id: str
+    ) -> tuple[int, Mapping[str, str], InimResult]:
+        """Return the extended status of the account devices.
+
+        Unlike InimCloud.get_devices_extended, `Data` holds every device of
+        the account and not only `device_id`.
+        """
+        return await self._async_coalesce(
+            "get_devices_extended", self._async_fetch_devices_extended
+        )
+
+    async def get_activate_scenario(
+        self, device_id: str, scenario_id: str
+    ) -> tuple[int, Mapping[str, str], str]:
+        """Activate a scenario of a device."""
+        return await self._async_call(
+            self.inim_cloud_api.get_activate_scenario, device_id, scenario_id
+        )
+
+    async def _async_call(
+        self,
+        method: Callable[..., Awaitable[tuple[int, Mapping[str, str], _T]]],
+        *args: Any,
+    ) -> tuple[int, Mapping[str, str], _T]:
+        await self.token()
+        return await self._async_checked(method.__name__, method(*args))
+
+    async def _async_checked(
+        self, name: str, call: Awaitable[tuple[int, Mapping[str, str], _T]]
+    ) -> tuple[int, Mapping[str, str], _T]:
+        """Await a cloud request, failing on HTTP errors."""
+        result = await self._async_request(name, call)
+        if result[0] >= 400:
+            self.metrics.counters[f"{name}_failures"] += 1
+            raise InimConnectionError(f"Inim cloud answered with HTTP {result[0]}")
+        return result
+
+    async def _async_request(self, name: str, call: Awaitable[_T]) -> _T:
+        """Await a cloud request, bounding it in time and typing its errors."""
+        start = monotonic()
+        try:
+            async with asyncio.timeout(REQUEST_TIMEOUT.total_seconds()):
+                return await call
+        # ValueError covers the JSONDecodeError of non JSON answers.
+        except (
+            MalformedResponseError,
+            TimeoutError,
+            aiohttp.ClientError,
+            ValueError,
+        ) as err:
+            self.metrics.counters[f"{name}_failures"] += 1
+            if isinstance(err, MalformedResponseError):
+                raise InimAuthError("Inim cloud rejected the credentials") from err
+            raise InimConnectionError(
+                f"Error talking to the Inim cloud: {err!r}"
+            ) from err
+        finally:
+            self.metrics.add(name, monotonic() - start)
+
+    async def _async_fetch_devices_extended(
+        self,
+    ) -> tuple[int, Mapping[str, str], InimResult]:
+        status, headers, raw = await self._async_checked(
+            "get_devices_extended",
+            request_devices_extended(self.inim_cloud_api, await self.token()),
+        )
+        self.metrics.add("payload_bytes", len(raw))
+        return status, headers, parse_devices_extended(raw)
+
+    async def _async_coalesce(
+        self, key: Hashable, factory: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        """Share the result of `factory` among the concurrent callers of `key`."""
+        if (future := self._in_flight.get(key)) is None:
+            future = self._in_flight[key] = asyncio.ensure_future(factory())
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A cancelled caller must not cancel the request of the others.
+        return await asyncio.shield(future)
+
+
+async def async_get_hub(
+    hass: HomeAssistant,
+    entry_id: str,
+    username: str,
+    password: str,
+    client_id: str,
+) -> InimHub:
+    """Return the hub of an account, creating it on first use.
+
+    pyinim is only imported here, out of the event loop, so that loading
+    the integration or its config flow does not pay for it.
+    """
+    token_cache = await async_get_token_cache(hass)
+    # Every entry of the account keeps the session open, not only the first.
+    session = async_get_session(hass, entry_id)
+    hubs: dict[tuple[str, str], InimHub] = hass.data.setdefault(DATA_HUBS, {})
+    if (username, client_id) not in hubs:
+        inim_cloud = await async_import_module(hass, "pyinim.inim_cloud")
+    # Entries set up together all wait for the import, the first one creates it.
+    if (hub := hubs.get((username, client_id))) is None:
+        hub = hubs[(username, client_id)] = InimHub(
+            hass,
+            inim_cloud.InimCloud(
+                session,
+                name="Inim",
+                username=username,
+                password=password,
+                client_id=client_id,
+            ),
+            token_cache,
+            username,
+            client_id,
+        )
+    elif hub.inim_cloud_api.resolver.password != password:
+        # A reauth changed the password, the next login uses the new one.
+        hub.inim_cloud_api.resolver.password = password
+    hub.entry_ids.add(entry_id)
+    return hub
+
+
+@callback
+def async_release_hub(hass: HomeAssistant, entry_id: str, hub: InimHub) -> None:
+    """Forget a config entry, dropping the hub with the last one.
+
+    The cloud session is closed after the last entry.
+    """
+    async_release_session(hass, entry_id)
+    hub.entry_ids.discard(entry_id)
+    if not hub.entry_ids:
+        hub.async_close()
+        hubs: dict[tuple[str, str], InimHub] = hass.data.get(DATA_HUBS, {})
+        for key, value in list(hubs.items()):
+            if value is hub:
+                del hubs[key]
@@ -0,0 +1,40 @@
+"""Describe the Inim logbook events."""
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.components.logbook import (
+    LOGBOOK_ENTRY_MESSAGE,
+    LOGBOOK_ENTRY_NAME,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DOMAIN, EVENT_TRANSITIONS, SCENARIOS_CONTEXT
+
+
+@callback
+def async_describe_events(
+    hass: HomeAssistant,
+    async_describe_event: Callable[[str, str, Callable[[Event], dict[str, str]]], None],
+) -> None:
+    """Describe the batches of transitions fired by the history."""
+
+    @callback
+    def async_describe_transitions(event: Event) -> dict[str, str]:
+        return {
+            LOGBOOK_ENTRY_NAME: f"Inim {event.data['device_id']}",
+            LOGBOOK_ENTRY_MESSAGE: ", ".join(
+                _describe(transition) for transition in event.data["transitions"]
+            ),
+        }
+
+    async_describe_event(DOMAIN, EVENT_TRANSITIONS, async_describe_transitions)
+
+
+def _describe(transition: dict[str, Any]) -> str:
+    if transition["field"] == SCENARIOS_CONTEXT:
+        return f"active scenarios {transition['old']} -> {transition['new']}"
+    return (
+        f"{transition['name']} {transition['field'].replace('_', ' ')} "
+        f"{transition['old']} -> {transition['new']}"
+    )
@@ -0,0 +1,72 @@
+"""Rolling measures of the Inim hot paths, for the diagnostics."""
+
+from collections import Counter, deque
+from math import ceil
+from typing import Any
+
+from .const import METRICS_WINDOW
+
+
+class RollingStat:
+    """The last `size` samples of a measure, with their percentiles."""
+
+    def __init__(self, size: int = METRICS_WINDOW) -> None:
+        """Initialize an empty measure."""
+        self._samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    @property
+    def last(self) -> float | None:
+        """Return the last sample."""
+        return self._samples[-1] if self._samples else None
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the nearest-rank percentile of the samples in the window."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarize the measure."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "last": self.last,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self._samples, default=None),
+        }
+
+
+class InimMetrics:
+    """Named rolling measures and counters."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.stats: dict[str, RollingStat] = {}
+        self.counters: Counter[str] = Counter()
+
+    def add(self, name: str, value: float) -> None:
+        """Add a sample to the measure `name`."""
+        if (stat := self.stats.get(name)) is None:
+            stat = self.stats[name] = RollingStat()
+        stat.add(value)
+
+    def stat(self, name: str) -> RollingStat:
+        """Return the measure `name`, empty if it has no sample yet."""
+        return self.stats.get(name) or RollingStat()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summarize every measure and counter."""
+        return {
+            "stats": {name: stat.as_dict() for name, stat in self.stats.items()},
+            "counters": dict(self.counters),
+        }
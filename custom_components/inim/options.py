@@ -0,0 +1,51 @@
+"""Settings of a config entry, the options overriding the entry data."""
+
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_SCAN_INTERVAL
+
+from .const import (
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PANELS,
+    CONF_ZONES,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+)
+
+
+def get_scan_interval(config_entry: ConfigEntry) -> timedelta:
+    """Return the base poll interval."""
+    return timedelta(
+        seconds=config_entry.options.get(
+            CONF_SCAN_INTERVAL, config_entry.data[CONF_SCAN_INTERVAL]
+        )
+    )
+
+
+def get_scan_interval_bounds(config_entry: ConfigEntry) -> tuple[timedelta, timedelta]:
+    """Return the minimum and maximum intervals of the adaptive polling."""
+
+    def get(key: str, default: int) -> timedelta:
+        return timedelta(
+            seconds=config_entry.options.get(key, config_entry.data.get(key, default))
+        )
+
+    return (
+        get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+        get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+    )
+
+
+def get_panels(config_entry: ConfigEntry) -> list[dict[str, Any]]:
+    """Return the alarm panels and their scenarios."""
+    return config_entry.options.get(CONF_PANELS, config_entry.data[CONF_PANELS])
+
+
+def get_zones(config_entry: ConfigEntry) -> set[int] | None:
+    """Return the ZoneIds to create entities for, None for every zone."""
+    if (zones := config_entry.options.get(CONF_ZONES)) is None:
+        return None
+    return set(zones)
@@ -0,0 +1,108 @@
+"""Adaptive polling policy and circuit breaker for the Inim coordinator."""
+
+from datetime import timedelta
+from time import monotonic
+
+from .const import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_TIME, FAST_POLL_PERIOD
+
+
+class AdaptivePollPolicy:
+    """Pick the next poll interval out of the recent panel activity.
+
+    After a zone or scenario change, or after a command was sent, the panel
+    is polled at `min_interval` for `fast_period`. Then every quiet poll
+    doubles the interval up to `max_interval`. Failures back off
+    exponentially with the same cap, and the first successful poll goes back
+    to `interval`.
+    """
+
+    def __init__(
+        self,
+        interval: timedelta,
+        min_interval: timedelta,
+        max_interval: timedelta,
+        fast_period: timedelta = FAST_POLL_PERIOD,
+    ) -> None:
+        """Initialize the policy, `interval` is the one used until something happens."""
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.base_interval = min(max(interval, self.min_interval), self.max_interval)
+        self.fast_period = fast_period
+        self.interval = self.base_interval
+        self._fast_until = 0.0
+        self._failures = 0
+
+    def set_interval(
+        self, interval: timedelta, min_interval: timedelta, max_interval: timedelta
+    ) -> timedelta:
+        """Change the intervals and start over from the base one, return it."""
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.base_interval = min(max(interval, self.min_interval), self.max_interval)
+        self.interval = self.base_interval
+        return self.interval
+
+    def activity(self) -> timedelta:
+        """Switch to fast polling, return the interval to use."""
+        self._fast_until = monotonic() + self.fast_period.total_seconds()
+        self.interval = self.min_interval
+        return self.interval
+
+    def success(self, changed: bool) -> timedelta:
+        """Account a successful poll, return the interval to use."""
+        if self._failures:
+            self._failures = 0
+            self.interval = self.base_interval
+        if changed:
+            return self.activity()
+        if monotonic() >= self._fast_until:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return self.interval
+
+    def failure(self) -> timedelta:
+        """Account a failed poll, return the interval to use."""
+        self._failures += 1
+        self.interval = min(self.interval * 2, self.max_interval)
+        return self.interval
+
+
+class CircuitBreaker:
+    """Stop calling the cloud while it keeps failing.
+
+    After `threshold` failed refreshes in a row the circuit opens, and for
+    `open_time` the refreshes fail without any request. Then a single trial
+    refresh is let through: a success closes the circuit, a failure opens it
+    again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        open_time: timedelta = CIRCUIT_OPEN_TIME,
+    ) -> None:
+        """Initialize a closed circuit."""
+        self.threshold = threshold
+        self.open_time = open_time
+        self.failures = 0
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while the requests must not be sent."""
+        return monotonic() < self._open_until
+
+    @property
+    def half_open(self) -> bool:
+        """Return True when the next refresh is a trial one."""
+        return self.failures >= self.threshold and not self.is_open
+
+    def success(self) -> None:
+        """Account a successful refresh, closing the circuit."""
+        self.failures = 0
+        self._open_until = 0.0
+
+    def failure(self) -> None:
+        """Account a failed refresh, opening the circuit past the threshold."""
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self._open_until = monotonic() + self.open_time.total_seconds()
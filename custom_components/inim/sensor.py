@@ -0,0 +1,141 @@
+"""Diagnostic sensors out of the Inim metrics."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant import core
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
+
+from .const import CONF_DEVICE_ID, DOMAIN
+from .coordinator import InimCoordinator
+from .entity import InimEntity
+from .metrics import RollingStat
+
+
+@dataclass(frozen=True, kw_only=True)
+class InimSensorEntityDescription(SensorEntityDescription):
+    """A diagnostic sensor and how to read it out of the coordinator."""
+
+    value_fn: Callable[[InimCoordinator], StateType]
+
+
+def _p95_ms(stat: RollingStat) -> float | None:
+    """Return the 95th percentile of a measure in seconds, in milliseconds."""
+    if (p95 := stat.percentile(95)) is None:
+        return None
+    return round(p95 * 1000, 1)
+
+
+SENSORS: tuple[InimSensorEntityDescription, ...] = (
+    InimSensorEntityDescription(
+        key="request_poll_latency",
+        name="RequestPoll latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: _p95_ms(
+            coordinator.metrics.stat("get_request_poll")
+        ),
+    ),
+    InimSensorEntityDescription(
+        key="devices_extended_latency",
+        name="GetDevicesExtended latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: _p95_ms(
+            coordinator.metrics.stat("get_devices_extended")
+        ),
+    ),
+    InimSensorEntityDescription(
+        key="payload_size",
+        name="GetDevicesExtended payload size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.hub.metrics.stat("payload_bytes").last,
+    ),
+    InimSensorEntityDescription(
+        key="refresh_failures",
+        name="Failed refreshes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.metrics.counters["refresh_failures"],
+    ),
+    InimSensorEntityDescription(
+        key="zones_changed",
+        name="Zones changed",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: coordinator.metrics.stat("zones_changed").last,
+    ),
+    InimSensorEntityDescription(
+        key="entity_update_time",
+        name="Entity update time p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda coordinator: _p95_ms(
+            coordinator.metrics.stat("update_listeners")
+        ),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: core.HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+):
+    """Set up the diagnostic sensors."""
+    coordinator: InimCoordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    device_id = config_entry.data[CONF_DEVICE_ID]
+
+    async_add_entities(
+        InimDiagnosticSensorEntity(coordinator, description, device_id)
+        for description in SENSORS
+    )
+
+
+class InimDiagnosticSensorEntity(InimEntity, SensorEntity):
+    """A measure of the polls of a device, disabled by default."""
+
+    entity_description: InimSensorEntityDescription
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: InimCoordinator,
+        description: InimSensorEntityDescription,
+        device_id: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"inim_{device_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, device_id)},
+            manufacturer="Inim",
+            name=f"Inim {device_id}",
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True, the measures matter the most while refreshes fail."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the value of the measure."""
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,55 @@
+"""Services of the Inim integration."""
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, HISTORY_SIZE, SERVICE_GET_HISTORY
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_LIMIT = "limit"
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_LIMIT, default=50): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=HISTORY_SIZE)
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    @callback
+    def async_get_history(call: ServiceCall) -> ServiceResponse:
+        """Return the last transitions of a panel, oldest first."""
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        if (runtime_data := hass.data.get(DOMAIN, {}).get(entry_id)) is None:
+            raise ServiceValidationError(f"Inim entry {entry_id} is not loaded")
+        history = runtime_data.coordinator.history
+        return {
+            "device_id": history.device_id,
+            "transitions": [
+                transition.as_dict()
+                for transition in history.async_latest(call.data[ATTR_LIMIT])
+            ],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        async_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
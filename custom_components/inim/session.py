@@ -0,0 +1,96 @@
+"""HTTP session of the Inim cloud requests, owned by the integration."""
+
+import aiohttp
+from aiohttp import hdrs
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+
+from .const import (
+    CLOUD_CONNECT_TIMEOUT,
+    CLOUD_CONNECTIONS,
+    CLOUD_DNS_CACHE_TTL,
+    CLOUD_KEEPALIVE_TIMEOUT,
+    DATA_SESSION,
+    REQUEST_TIMEOUT,
+)
+
+
+class InimSession:
+    """One aiohttp session for the cloud requests of every config entry.
+
+    Unlike the session shared by Home Assistant, its connections only go to
+    the Inim API host: they are kept open between polls, the host address
+    is resolved once per CLOUD_DNS_CACHE_TTL and the answers are gzipped.
+    It is closed with the last entry using it, or when Home Assistant stops.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Open the session, the connections are opened on first use."""
+        self.hass = hass
+        self.entry_ids: set[str] = set()
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit_per_host=CLOUD_CONNECTIONS,
+                keepalive_timeout=CLOUD_KEEPALIVE_TIMEOUT.total_seconds(),
+                use_dns_cache=True,
+                ttl_dns_cache=int(CLOUD_DNS_CACHE_TTL.total_seconds()),
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=REQUEST_TIMEOUT.total_seconds(),
+                connect=CLOUD_CONNECT_TIMEOUT.total_seconds(),
+            ),
+            headers={
+                hdrs.ACCEPT_ENCODING: "gzip, deflate",
+                hdrs.USER_AGENT: SERVER_SOFTWARE,
+            },
+        )
+        self._unsub_close: CALLBACK_TYPE | None = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_close_at_stop
+        )
+
+    @callback
+    def _async_close_at_stop(self, _event: Event) -> None:
+        self._unsub_close = None
+        self.async_close()
+
+    @callback
+    def async_close(self) -> None:
+        """Close the session and its connections."""
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+        if self.hass.data.get(DATA_SESSION) is self:
+            del self.hass.data[DATA_SESSION]
+        self.hass.async_create_background_task(
+            self.session.close(), "inim session close"
+        )
+
+
+@callback
+def async_get_session(
+    hass: HomeAssistant, entry_id: str | None = None
+) -> aiohttp.ClientSession:
+    """Return the session of the cloud requests, opening it on first use.
+
+    `entry_id` keeps it open until async_release_session. The config flow
+    passes none, its requests only borrow the session.
+    """
+    shared: InimSession | None = hass.data.get(DATA_SESSION)
+    if shared is None:
+        shared = hass.data[DATA_SESSION] = InimSession(hass)
+    if entry_id is not None:
+        shared.entry_ids.add(entry_id)
+    return shared.session
+
+
+@callback
+def async_release_session(hass: HomeAssistant, entry_id: str) -> None:
+    """Forget a config entry, closing the session after the last one."""
+    shared: InimSession | None = hass.data.get(DATA_SESSION)
+    if shared is None or entry_id not in shared.entry_ids:
+        return
+    shared.entry_ids.discard(entry_id)
+    if not shared.entry_ids:
+        shared.async_close()
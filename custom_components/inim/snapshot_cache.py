@@ -0,0 +1,41 @@
+"""Last good snapshot of each config entry, persisted for fast startups."""
+
+from typing import TypedDict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_KEY, SNAPSHOT_STORAGE_VERSION
+
+
+class CachedSnapshot(TypedDict):
+    """An InimData in compact form, one row of ZoneSnapshot fields per zone."""
+
+    zones: list[list[int | str]]
+    active_scenarios: list[int]
+
+
+class InimSnapshotCache:
+    """The last good snapshot of a config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache of an entry."""
+        self._store: Store[CachedSnapshot] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{entry_id}"
+        )
+
+    async def async_load(self) -> CachedSnapshot | None:
+        """Return the saved snapshot, if any."""
+        return await self._store.async_load()
+
+    @callback
+    def async_save(self, snapshot: CachedSnapshot) -> None:
+        """Save a snapshot, at most once every SNAPSHOT_SAVE_DELAY seconds.
+
+        A snapshot still waiting to be written is replaced.
+        """
+        self._store.async_delay_save(lambda: snapshot, SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the saved snapshot."""
+        await self._store.async_remove()
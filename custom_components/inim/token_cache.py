@@ -0,0 +1,68 @@
+"""Inim cloud tokens persisted across restarts and reloads."""
+
+from time import time
+from typing import TypedDict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_TOKEN_CACHE, TOKEN_STORAGE_KEY, TOKEN_STORAGE_VERSION
+
+SAVE_DELAY = 1
+
+
+class CachedToken(TypedDict):
+    """A token and the epoch time it expires at."""
+
+    token: str
+    expires_at: float
+
+
+class InimTokenCache:
+    """Tokens of every account, keyed by username and client id."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, CachedToken]] = Store(
+            hass, TOKEN_STORAGE_VERSION, TOKEN_STORAGE_KEY, private=True
+        )
+        self._tokens: dict[str, CachedToken] = {}
+
+    async def async_load(self) -> None:
+        """Load the tokens that did not expire yet."""
+        now = time()
+        self._tokens = {
+            key: cached
+            for key, cached in (await self._store.async_load() or {}).items()
+            if cached["expires_at"] > now
+        }
+
+    def get(self, username: str, client_id: str) -> CachedToken | None:
+        """Return the token of an account, if it is still valid."""
+        cached = self._tokens.get(_key(username, client_id))
+        if cached is None or cached["expires_at"] <= time():
+            return None
+        return cached
+
+    @callback
+    def async_set(
+        self, username: str, client_id: str, token: str, expires_at: float
+    ) -> None:
+        """Remember the token of an account."""
+        self._tokens[_key(username, client_id)] = CachedToken(
+            token=token, expires_at=expires_at
+        )
+        self._store.async_delay_save(lambda: self._tokens, SAVE_DELAY)
+
+
+def _key(username: str, client_id: str) -> str:
+    return f"{username}:{client_id}"
+
+
+@singleton(DATA_TOKEN_CACHE)
+async def async_get_token_cache(hass: HomeAssistant) -> InimTokenCache:
+    """Return the token cache, loading it on first use."""
+    cache = InimTokenCache(hass)
+    await cache.async_load()
+    return cache
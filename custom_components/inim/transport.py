@@ -0,0 +1,57 @@
+"""GetDevicesExtended for every device of the account, which pyinim drops."""
+
+from collections.abc import Mapping
+import json
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from .exceptions import InimApiError, InimConnectionError, InimDeviceNotFoundError
+from .types import Device, InimResult
+
+if TYPE_CHECKING:
+    from pyinim.inim_cloud import InimCloud
+
+
+async def request_devices_extended(
+    api: "InimCloud", token: str
+) -> tuple[int, Mapping[str, str], str]:
+    """Send GetDevicesExtended, return the raw answer.
+
+    InimCloud.get_devices_extended drops every device but the requested
+    one, this is the same request without the filtering. Parse the answer
+    with parse_devices_extended.
+    """
+    return await api._request(  # noqa: SLF001
+        "GET", api.resolver.get_devices_extended_url(token), headers={}
+    )
+
+
+def parse_devices_extended(raw: str) -> InimResult:
+    """Parse a GetDevicesExtended answer the same way pyinim does.
+
+    Unlike pyinim, every device of `Data` is kept.
+    """
+    try:
+        result = json.loads(raw, object_hook=lambda d: SimpleNamespace(**d))
+    except ValueError as err:
+        raise InimConnectionError(f"Malformed Inim cloud answer: {err}") from err
+    if getattr(result, "Status", None) != 0 or result.Data is None:
+        raise InimApiError(
+            f"Inim cloud error {getattr(result, 'Status', None)}: "
+            f"{getattr(result, 'ErrMsg', '')}"
+        )
+    result.Data = vars(result.Data)
+    return result
+
+
+def get_device(result: InimResult, device_id: str) -> Device:
+    """Return a device out of a GetDevicesExtended result.
+
+    Raises InimDeviceNotFoundError if the account does not have it.
+    """
+    try:
+        return result.Data[device_id]
+    except KeyError:
+        raise InimDeviceNotFoundError(
+            f"Inim device {device_id} is not one of the account any more"
+        ) from None
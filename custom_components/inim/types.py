@@ -1,9 +1,44 @@
 """Component level custom types."""
 
-from pyinim.cloud.types.devices import Data, Devices, Zones
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, TypeAlias
 
-InimResult = Devices
+if TYPE_CHECKING:
+    from pyinim.cloud.types.devices import Data, Devices, Zones
 
-Device = Data
+# The pyinim types are only needed by the type checker.
+InimResult: TypeAlias = "Devices"
 
-Zone = Zones
+Device: TypeAlias = "Data"
+
+Zone: TypeAlias = "Zones"
+
+
+@dataclass(frozen=True, slots=True)
+class ZoneSnapshot:
+    """The fields of a zone the entities use, without the rest of the record.
+
+    The fields added after the first ones have defaults, so the rows saved
+    by the snapshot cache before them still load.
+    """
+
+    zone_id: int
+    status: int
+    name: str
+    type: int
+    alarm_memory: int = 0
+    tamper_memory: int = 0
+    bypassed: int = 0
+
+    @classmethod
+    def from_zone(cls, zone: Zone) -> "ZoneSnapshot":
+        """Keep what is needed out of a pyinim zone."""
+        return cls(
+            zone.ZoneId,
+            zone.Status,
+            zone.Name,
+            zone.Type,
+            zone.AlarmMemory,
+            zone.TamperMemory,
+            zone.Bypassed,
+        )
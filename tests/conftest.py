@@ -0,0 +1,77 @@
+"""Fixtures for the Inim tests."""
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.inim.const import DOMAIN
+
+from .fake_inim_cloud import DEVICE_ID, FakeInimCloud
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the custom integrations in every test."""
+    yield
+
+
+@pytest.fixture
+async def inim_cloud(request, socket_enabled):
+    """Start a fake Inim cloud and point pyinim at it.
+
+    Parametrize it indirectly with the number of zones.
+    """
+    cloud = FakeInimCloud(zones=getattr(request, "param", 10))
+    await cloud.start()
+    with patch("pyinim.cloud.resolver.API_CLOUD_BASEURL", cloud.url):
+        yield cloud
+    await cloud.close()
+
+
+@pytest.fixture
+def config_entry(hass):
+    """Add an Inim config entry with one panel to hass."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Inim Alarm",
+        data={
+            "username": "user@example.com",
+            "password": "password",
+            "client_id": "homeassistant",
+            "device_id": DEVICE_ID,
+            "scan_interval": 30,
+            "panels": [
+                {
+                    "panel_name": "Inim Alarm Panel",
+                    "unique_id": "alarm_control_panel_inim_alarm_panel",
+                    "scenarios": {
+                        "armed_away": 0,
+                        "disarmed": 1,
+                        "armed_night": 2,
+                        "armed_home": 3,
+                        "armed_vacation": 0,
+                    },
+                }
+            ],
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+def other_entry(hass, inim_cloud, config_entry):
+    """Add an entry for another device of the same account."""
+    inim_cloud.other_devices = ["2002"]
+    panel = config_entry.data["panels"][0]
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Inim Garage",
+        data={
+            **config_entry.data,
+            "device_id": "2002",
+            "panels": [{**panel, "unique_id": f"{panel['unique_id']}_2002"}],
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
@@ -0,0 +1,183 @@
+"""Local stand-in for the Inim cloud endpoints used by pyinim."""
+import asyncio
+from collections import Counter
+import json
+import random
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+DEVICE_ID = "1001"
+TOKEN = "fake-token"
+
+
+def make_zone(zone_id: int, status: int = 1) -> dict:
+    """Return a zone record as GetDevicesExtended sends it."""
+    return {
+        "ZoneId": zone_id,
+        "Type": 1,
+        "TerminalId": zone_id,
+        "Name": f"Zone {zone_id}",
+        "Areas": 1,
+        "Status": status,
+        "AlarmMemory": 0,
+        "TamperMemory": 0,
+        "Bypassed": 0,
+        "OutputOn": 0,
+        "OutputValue": 0,
+        "Power": 0,
+        "Voltage": 0,
+        "CosPhi": 0,
+        "InputType": 0,
+        "InputFlags": 0,
+        "OutputFlags": 0,
+        "Monost": 0,
+        "OutputCategory": 0,
+        "Channels": [],
+        "Favorite": 0,
+        "Special": 0,
+        "Visibility": 1,
+    }
+
+
+class FakeInimCloud:
+    """Serve RegisterClient, RequestPoll, GetDevicesExtended and ActivateScenario.
+
+    `latency` delays every answer, `fail_rate` (0..1) and `fail_next` make
+    requests fail with a non JSON 503 answer. `reject_login` makes
+    RegisterClient answer without a token, as for a wrong password.
+    `other_devices` are more devices of the account, with the same zones.
+    GetDevicesExtended answers with the zones and scenarios as of the last
+    RequestPoll, which takes `poll_delay` to reach the panel.
+    `connections` has the client end of every TCP connection served,
+    `compressed` counts the answers gzipped for the client.
+    """
+
+    def __init__(
+        self,
+        zones: int = 10,
+        device_id: str = DEVICE_ID,
+        latency: float = 0.0,
+        fail_rate: float = 0.0,
+    ) -> None:
+        """Initialize a panel with `zones` idle zones and scenario 1 active."""
+        self.device_id = device_id
+        self.other_devices: list[str] = []
+        self.latency = latency
+        self.poll_delay = 0.0
+        self.fail_rate = fail_rate
+        self.fail_next = 0
+        self.reject_login = False
+        self.active_scenarios = [1]
+        self.zones = [make_zone(zone_id) for zone_id in range(1, zones + 1)]
+        # Zones and active scenarios of the last RequestPoll, if any.
+        self._polled: tuple[list[dict], list[int]] | None = None
+        self.requests: Counter[str] = Counter()
+        self.payload_bytes = 0
+        self.connections: set[tuple[str, int]] = set()
+        self.compressed = 0
+        self._random = random.Random(0)
+        self._server: TestServer | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to give to pyinim."""
+        assert self._server is not None
+        return str(self._server.make_url("")).rstrip("/")
+
+    async def start(self) -> None:
+        """Start listening on localhost."""
+        app = web.Application()
+        app.router.add_get("/", self._handle)
+        self._server = TestServer(app)
+        await self._server.start_server()
+
+    async def close(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            await self._server.close()
+
+    def set_zone_status(self, zone_id: int, status: int) -> None:
+        """Change the Status of a zone."""
+        self.zones[zone_id - 1]["Status"] = status
+
+    def device(self, device_id: str | None = None) -> dict:
+        """Return the device record as GetDevicesExtended sends it."""
+        zones, active_scenarios = self._polled or (self.zones, self.active_scenarios)
+        return {
+            "DeviceId": int(device_id or self.device_id),
+            "ActiveScenario": active_scenarios[0],
+            "ActiveScenarios": ",".join(str(x) for x in active_scenarios),
+            "Name": "Fake panel",
+            "SerialNumber": "0000",
+            "ModelFamily": "Prime",
+            "ModelNumber": "060L",
+            "FirmwareVersionMajor": "3",
+            "FirmwareVersionMinor": "0",
+            "NetworkStatus": 1,
+            "Voltage": 13.8,
+            "Faults": 0,
+            "Areas": [
+                {
+                    "AreaId": 1,
+                    "Name": "Area 1",
+                    "Armed": 4,
+                    "Alarm": 0,
+                    "AlarmMemory": 0,
+                    "Tamper": 0,
+                    "TamperMemory": 0,
+                    "AutoInsert": 0,
+                }
+            ],
+            "Scenarios": [
+                {
+                    "ScenarioId": scenario_id,
+                    "Name": f"Scenario {scenario_id}",
+                    "AreaSet": "",
+                    "AreaMask": 1,
+                    "Icona": 0,
+                    "Uscita": 0,
+                }
+                for scenario_id in range(6)
+            ],
+            "Zones": zones,
+            "Peripherals": [],
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        req = json.loads(request.query["req"])
+        method = req["Method"]
+        self.requests[method] += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_next or self._random.random() < self.fail_rate:
+            self.fail_next = max(self.fail_next - 1, 0)
+            return web.Response(status=503, text="Service Unavailable")
+
+        data: object = None
+        if method == "RegisterClient":
+            if not self.reject_login:
+                data = {"Token": TOKEN, "TTL": 604800}
+        elif method == "RequestPoll":
+            if self.poll_delay:
+                await asyncio.sleep(self.poll_delay)
+            self._polled = (
+                [dict(zone) for zone in self.zones],
+                list(self.active_scenarios),
+            )
+        elif method == "GetDevicesExtended":
+            data = {
+                device_id: self.device(device_id)
+                for device_id in [self.device_id, *self.other_devices]
+            }
+        elif method == "ActivateScenario":
+            self.active_scenarios = [int(req["Params"]["ScenarioId"])]
+
+        body = json.dumps({"Status": 0, "ErrMsg": "", "ts": "", "Data": data})
+        self.payload_bytes += len(body)
+        response = web.Response(text=body, content_type="application/json")
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response.enable_compression(web.ContentCoding.gzip)
+            self.compressed += 1
+        return response
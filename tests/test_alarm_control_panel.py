@@ -0,0 +1,180 @@
+"""Tests of the alarm control panel."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components.alarm_control_panel import (
+    DOMAIN as ALARM_DOMAIN,
+    AlarmControlPanelState,
+)
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.inim.alarm_control_panel import reverse_scenarios
+from custom_components.inim.const import (
+    CONFIRM_INTERVAL,
+    CONFIRM_TIMEOUT,
+    DEFAULT_STATE_PRECEDENCE,
+    DOMAIN,
+)
+
+ENTITY_ID = "alarm_control_panel.inim_alarm_panel"
+
+SCENARIOS = {
+    "armed_away": 0,
+    "disarmed": 1,
+    "armed_night": 2,
+    "armed_home": 3,
+    "armed_vacation": 0,
+}
+
+
+@pytest.fixture
+async def coordinator(hass, inim_cloud, config_entry, freezer):
+    """Set up the entry under a frozen clock, commands sent right away."""
+    with (
+        patch("custom_components.inim.commands.COMMAND_DEDUP_WINDOW", timedelta()),
+        patch("custom_components.inim.commands.COMMAND_MIN_INTERVAL", timedelta()),
+    ):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        yield hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+
+async def _async_call(hass, service: str) -> None:
+    await hass.services.async_call(
+        ALARM_DOMAIN, service, {"entity_id": ENTITY_ID}, blocking=True
+    )
+
+
+async def _async_confirm_step(hass, freezer, coordinator) -> None:
+    """Move the frozen clock to the next refresh of the confirmation.
+
+    The confirmation runs as a background task, wait for its refresh.
+    """
+    refreshed = asyncio.Event()
+    async_refresh = coordinator.async_refresh
+
+    async def _async_refresh() -> None:
+        await async_refresh()
+        refreshed.set()
+
+    with patch.object(coordinator, "async_refresh", _async_refresh):
+        freezer.tick(CONFIRM_INTERVAL)
+        async_fire_time_changed(hass)
+        await refreshed.wait()
+    await hass.async_block_till_done()
+
+
+def test_reverse_scenarios():
+    """A shared scenario stands for the first of its states."""
+    assert reverse_scenarios(SCENARIOS, DEFAULT_STATE_PRECEDENCE) == {
+        0: (0, AlarmControlPanelState.ARMED_AWAY),
+        1: (1, AlarmControlPanelState.DISARMED),
+        2: (2, AlarmControlPanelState.ARMED_NIGHT),
+        3: (3, AlarmControlPanelState.ARMED_HOME),
+    }
+    precedence = ["armed_vacation", *DEFAULT_STATE_PRECEDENCE[:-1]]
+    assert reverse_scenarios(SCENARIOS, precedence)[0] == (
+        0,
+        AlarmControlPanelState.ARMED_VACATION,
+    )
+
+
+async def test_overlapping_scenarios(hass, inim_cloud, config_entry):
+    """Shared scenarios, and several active ones, resolve through the precedence."""
+    panel = config_entry.data["panels"][0]
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            "panels": [
+                {
+                    **panel,
+                    "state_precedence": [
+                        "armed_vacation",
+                        "armed_night",
+                        "armed_away",
+                        "disarmed",
+                        "armed_home",
+                    ],
+                }
+            ],
+        },
+    )
+    inim_cloud.active_scenarios = [0]
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "armed_vacation"
+    )
+
+    inim_cloud.active_scenarios = [1, 2]
+    await coordinator.async_refresh()
+
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "armed_night"
+    )
+
+
+async def test_arm_confirmed(hass, inim_cloud, coordinator, freezer):
+    """Arming lasts until a refresh shows the scenario active."""
+    await _async_call(hass, "alarm_arm_night")
+
+    assert inim_cloud.active_scenarios == [2]
+    assert hass.states.get(ENTITY_ID).state == "arming"
+    await _async_confirm_step(hass, freezer, coordinator)
+    assert hass.states.get(ENTITY_ID).state == "armed_night"
+
+    # Confirmed, the panel does not poll for it anymore.
+    polls = inim_cloud.requests["RequestPoll"]
+    freezer.tick(CONFIRM_INTERVAL)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert inim_cloud.requests["RequestPoll"] == polls
+
+
+async def test_arm_timeout(hass, inim_cloud, coordinator, freezer):
+    """An arm the panel never reports rolls back after CONFIRM_TIMEOUT."""
+    await _async_call(hass, "alarm_arm_away")
+    # The panel did not take the scenario.
+    inim_cloud.active_scenarios = [1]
+
+    for _ in range(CONFIRM_TIMEOUT // CONFIRM_INTERVAL - 1):
+        await _async_confirm_step(hass, freezer, coordinator)
+        assert hass.states.get(ENTITY_ID).state == "arming"
+    await _async_confirm_step(hass, freezer, coordinator)
+
+    assert hass.states.get(ENTITY_ID).state == "disarmed"
+
+
+async def test_disarm(hass, inim_cloud, coordinator, freezer):
+    """Disarming lasts until a refresh shows the disarmed scenario."""
+    inim_cloud.active_scenarios = [3]
+    await coordinator.async_refresh()
+    assert hass.states.get(ENTITY_ID).state == "armed_home"
+
+    await _async_call(hass, "alarm_disarm")
+
+    assert hass.states.get(ENTITY_ID).state == "disarming"
+    await _async_confirm_step(hass, freezer, coordinator)
+    assert hass.states.get(ENTITY_ID).state == "disarmed"
+
+
+async def test_command_while_pending(hass, inim_cloud, coordinator, freezer):
+    """A command sent while another waits for confirmation replaces it."""
+    await _async_call(hass, "alarm_arm_away")
+    inim_cloud.active_scenarios = [1]
+    await _async_confirm_step(hass, freezer, coordinator)
+    assert hass.states.get(ENTITY_ID).state == "arming"
+
+    await _async_call(hass, "alarm_arm_home")
+    await _async_confirm_step(hass, freezer, coordinator)
+    assert hass.states.get(ENTITY_ID).state == "armed_home"
+
+    # The confirmation of the first command does not roll it back.
+    freezer.tick(CONFIRM_TIMEOUT)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(ENTITY_ID).state == "armed_home"
@@ -0,0 +1,220 @@
+"""Benchmarks of the integration against the fake Inim cloud."""
+from pathlib import Path
+import subprocess
+import sys
+from time import perf_counter
+from unittest.mock import patch
+
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+import pytest
+
+from custom_components.inim.const import DATA_SESSION, DOMAIN
+
+ZONES = [10, 100, 1000]
+PANELS = 20
+REFRESHES = 20
+# Loaded by Home Assistant before any integration, not part of the import cost
+IMPORT_PRELUDE = (
+    "import homeassistant.helpers.aiohttp_client, "
+    "homeassistant.helpers.update_coordinator, homeassistant.helpers.storage"
+)
+
+
+def _report(
+    record_property, name: str, zones: int | None, value: float, unit: str = "s"
+) -> None:
+    """Record a figure in the junit report of the run."""
+    label = name if zones is None else f"{name} zones={zones}"
+    record_property(f"{label} ({unit})" if unit else label, f"{value:.6f}")
+
+
+async def _async_setup(hass, config_entry):
+    start = perf_counter()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return perf_counter() - start
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("inim_cloud", ZONES, indirect=True)
+async def test_setup_time(hass, inim_cloud, config_entry, record_property):
+    """Time the setup of an entry until every entity has a state."""
+    elapsed = await _async_setup(hass, config_entry)
+    _report(record_property, "setup", len(inim_cloud.zones), elapsed)
+    assert len(hass.states.async_entity_ids("binary_sensor")) == len(inim_cloud.zones)
+    assert len(hass.states.async_entity_ids("alarm_control_panel")) == 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("inim_cloud", [1000], indirect=True)
+@pytest.mark.parametrize("panels", [1, PANELS])
+async def test_startup_time(hass, inim_cloud, config_entry, panels, record_property):
+    """Time the startup of an entry with many zones and panels.
+
+    Every entity comes out of the snapshot of the first refresh, there is
+    no other request before the entry is set up.
+    """
+    panel = config_entry.data["panels"][0]
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            "panels": [
+                {
+                    **panel,
+                    "panel_name": f"Panel {i}",
+                    "unique_id": f"{panel['unique_id']}_{i}",
+                }
+                for i in range(panels)
+            ],
+        },
+    )
+
+    elapsed = await _async_setup(hass, config_entry)
+
+    _report(record_property, f"startup panels={panels}", len(inim_cloud.zones), elapsed)
+    assert inim_cloud.requests["RequestPoll"] == 1
+    assert inim_cloud.requests["GetDevicesExtended"] == 1
+    assert len(hass.states.async_entity_ids("binary_sensor")) == len(inim_cloud.zones)
+    assert len(hass.states.async_entity_ids("alarm_control_panel")) == panels
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("inim_cloud", ZONES, indirect=True)
+async def test_refresh_throughput(hass, inim_cloud, config_entry, record_property):
+    """Count the refreshes per second, one zone changing every time."""
+    await _async_setup(hass, config_entry)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+    start = perf_counter()
+    for i in range(REFRESHES):
+        inim_cloud.set_zone_status(1, 2 if i % 2 == 0 else 1)
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    elapsed = perf_counter() - start
+
+    _report(
+        record_property,
+        "refresh throughput",
+        len(inim_cloud.zones),
+        REFRESHES / elapsed,
+        "/s",
+    )
+    assert coordinator.last_update_success
+    assert hass.states.get("binary_sensor.zone_1").state == "off"
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("inim_cloud", ZONES, indirect=True)
+async def test_entity_update_cost(hass, inim_cloud, config_entry, record_property):
+    """Time the state write of every entity after a refresh.
+
+    Every entity writes its state once per update, never more.
+    """
+    await _async_setup(hass, config_entry)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    entities = sum(
+        not entry.disabled
+        for entry in er.async_entries_for_config_entry(
+            er.async_get(hass), config_entry.entry_id
+        )
+    )
+
+    with patch.object(
+        Entity,
+        "async_write_ha_state",
+        autospec=True,
+        side_effect=Entity.async_write_ha_state,
+    ) as write:
+        start = perf_counter()
+        for _ in range(REFRESHES):
+            # Notify every listener, as the first snapshot does.
+            coordinator.async_update_listeners()
+        elapsed = perf_counter() - start
+
+    _report(
+        record_property,
+        "entity update",
+        len(inim_cloud.zones),
+        elapsed / REFRESHES / entities,
+    )
+    assert entities > len(inim_cloud.zones)
+    assert write.call_count == REFRESHES * entities
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "module",
+    [
+        "custom_components.inim",
+        "custom_components.inim.config_flow",
+        "custom_components.inim.binary_sensor",
+        "custom_components.inim.alarm_control_panel",
+        "custom_components.inim.sensor",
+    ],
+)
+def test_import_time(module, record_property):
+    """Time the import of a module of the integration in a fresh interpreter.
+
+    pyinim is left for the setup of the first cloud entry.
+    """
+    code = (
+        f"{IMPORT_PRELUDE}\n"
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        "print('pyinim.inim_cloud' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        text=True,
+    )
+    elapsed, pyinim_loaded = result.stdout.split()
+    _report(record_property, f"import {module}", None, float(elapsed))
+    assert pyinim_loaded == "False"
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("inim_cloud", [1000], indirect=True)
+async def test_cloud_session(hass, inim_cloud, config_entry, record_property):
+    """Measure the polls over the session of the integration.
+
+    Every request after the login reuses the same keep-alive connection,
+    and the session is closed with the entry.
+    """
+    await _async_setup(hass, config_entry)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    connections = len(inim_cloud.connections)
+
+    start = perf_counter()
+    for _ in range(REFRESHES):
+        await coordinator.async_refresh()
+    elapsed = perf_counter() - start
+
+    _report(
+        record_property,
+        "cloud poll latency",
+        len(inim_cloud.zones),
+        elapsed / REFRESHES,
+    )
+    requests = sum(inim_cloud.requests.values())
+    _report(
+        record_property,
+        "cloud requests per connection",
+        None,
+        requests / len(inim_cloud.connections),
+        "",
+    )
+    assert len(inim_cloud.connections) == connections == 1
+    assert inim_cloud.compressed == requests
+
+    session = hass.data[DATA_SESSION].session
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert DATA_SESSION not in hass.data
+    assert session.closed
@@ -0,0 +1,143 @@
+"""Tests of the zone binary sensors."""
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import Entity
+
+from custom_components.inim.binary_sensor import ZONE_SENSORS
+from custom_components.inim.const import DOMAIN
+
+from .fake_inim_cloud import DEVICE_ID
+
+
+async def test_zone_sensors_registered(hass, inim_cloud, config_entry):
+    """Every zone gets one sensor per description, the extra ones disabled."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entries = [
+        entry
+        for entry in er.async_entries_for_config_entry(
+            er.async_get(hass), config_entry.entry_id
+        )
+        if entry.domain == "binary_sensor"
+    ]
+    assert len(entries) == len(inim_cloud.zones) * len(ZONE_SENSORS)
+    assert len(hass.states.async_entity_ids("binary_sensor")) == len(inim_cloud.zones)
+
+
+async def test_tamper_sensor(hass, inim_cloud, config_entry):
+    """An enabled tamper sensor follows the TamperMemory of its zone."""
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "binary_sensor",
+        DOMAIN,
+        f"binary_sensor.inim_{DEVICE_ID}_1_tamper",
+        config_entry=config_entry,
+        suggested_object_id="zone_1_tamper",
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    assert hass.states.get("binary_sensor.zone_1_tamper").state == "off"
+
+    inim_cloud.zones[0]["TamperMemory"] = 1
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("binary_sensor.zone_1_tamper").state == "on"
+    assert hass.states.get("binary_sensor.zone_1").state == "off"
+
+
+async def test_only_changed_zone_written(hass, inim_cloud, config_entry):
+    """A refresh writes the state of the zones that changed, and no other."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+    inim_cloud.set_zone_status(3, 2)
+    with patch.object(
+        Entity,
+        "async_write_ha_state",
+        autospec=True,
+        side_effect=Entity.async_write_ha_state,
+    ) as write:
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    assert [call.args[0].entity_id for call in write.call_args_list] == [
+        "binary_sensor.zone_3"
+    ]
+    assert hass.states.get("binary_sensor.zone_3").state == "on"
+
+
+async def test_zones_of_two_devices(hass, inim_cloud, config_entry, other_entry):
+    """Two devices of an account with the same ZoneIds get their own sensors."""
+    # Sets up every entry of the domain.
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert other_entry.state is ConfigEntryState.LOADED
+
+    device_registry = dr.async_get(hass)
+    for entry in (config_entry, other_entry):
+        entries = er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        assert (
+            len([entry for entry in entries if entry.domain == "binary_sensor"])
+            == len(inim_cloud.zones) * len(ZONE_SENSORS)
+        )
+        assert device_registry.async_get_device(
+            identifiers={(DOMAIN, f"{entry.data['device_id']}_1")}
+        )
+    assert len(hass.states.async_entity_ids("binary_sensor")) == 2 * len(
+        inim_cloud.zones
+    )
+
+
+async def test_zone_ids_migrated(hass, inim_cloud, config_entry):
+    """The zone unique_ids and devices of 1.2 entries get the device_id."""
+    hass.config_entries.async_update_entry(config_entry, minor_version=2)
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_or_create(
+        config_entry_id=config_entry.entry_id, identifiers={(DOMAIN, 1)}
+    )
+    registry = er.async_get(hass)
+    status = registry.async_get_or_create(
+        "binary_sensor",
+        DOMAIN,
+        "binary_sensor.inim_zone_1_1",
+        config_entry=config_entry,
+        device_id=device.id,
+        suggested_object_id="zone_1",
+    )
+    tamper = registry.async_get_or_create(
+        "binary_sensor",
+        DOMAIN,
+        "binary_sensor.inim_1_tamper",
+        config_entry=config_entry,
+        device_id=device.id,
+        suggested_object_id="zone_1_tamper",
+    )
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.minor_version == 3
+    assert registry.async_get(status.entity_id).unique_id == (
+        f"binary_sensor.inim_{DEVICE_ID}_1"
+    )
+    assert registry.async_get(tamper.entity_id).unique_id == (
+        f"binary_sensor.inim_{DEVICE_ID}_1_tamper"
+    )
+    assert device_registry.async_get(device.id).identifiers == {
+        (DOMAIN, f"{DEVICE_ID}_1")
+    }
+    assert hass.states.get("binary_sensor.zone_1").state == "off"
+    zone_devices = [
+        device
+        for device in dr.async_entries_for_config_entry(
+            device_registry, config_entry.entry_id
+        )
+        if device.model is not None and device.name.startswith("Zone")
+    ]
+    assert len(zone_devices) == len(inim_cloud.zones)
@@ -0,0 +1,59 @@
+"""Tests of the scenario command queue."""
+import asyncio
+
+import pytest
+
+from custom_components.inim.commands import CommandOutcome
+from custom_components.inim.const import DOMAIN
+from custom_components.inim.exceptions import InimConnectionError
+
+
+@pytest.fixture
+async def coordinator(hass, inim_cloud, config_entry):
+    """Set up the entry and return its coordinator."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+
+async def test_last_writer_wins(hass, inim_cloud, coordinator):
+    """Commands queued within the window collapse into the last one."""
+    results = await asyncio.gather(
+        coordinator.commands.async_activate_scenario(0),
+        coordinator.commands.async_activate_scenario(2),
+        coordinator.commands.async_activate_scenario(2),
+    )
+
+    assert [result.outcome for result in results] == [
+        CommandOutcome.SUPERSEDED,
+        CommandOutcome.SENT,
+        CommandOutcome.SENT,
+    ]
+    assert inim_cloud.requests["ActivateScenario"] == 1
+    assert inim_cloud.active_scenarios == [2]
+    # The coordinator got the hint to poll faster.
+    assert coordinator.update_interval == coordinator.poll_policy.min_interval
+
+
+async def test_failed_command_raises(hass, inim_cloud, coordinator):
+    """The error of the cloud reaches the caller."""
+    inim_cloud.fail_next = 1
+
+    with pytest.raises(InimConnectionError):
+        await coordinator.commands.async_activate_scenario(0)
+
+    assert coordinator.commands.outcomes[CommandOutcome.FAILED] == 1
+
+
+async def test_cancel_while_sending(hass, inim_cloud, coordinator):
+    """Cancelling the queue releases the caller of the command being sent."""
+    inim_cloud.latency = 5
+    call = hass.async_create_task(coordinator.commands.async_activate_scenario(0))
+    while not inim_cloud.requests["ActivateScenario"]:
+        await asyncio.sleep(0.05)
+
+    coordinator.commands.async_cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        async with asyncio.timeout(1):
+            await call
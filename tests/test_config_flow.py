@@ -0,0 +1,87 @@
+"""Tests of the config flow discovery."""
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.inim.const import DOMAIN
+
+from .fake_inim_cloud import DEVICE_ID
+
+CREDENTIALS = {
+    "username": "user@example.com",
+    "password": "password",
+    "client_id": "homeassistant",
+}
+PANEL = {
+    "armed_away": 0,
+    "disarmed": 1,
+    "armed_night": 2,
+    "armed_home": 3,
+    "armed_vacation": 0,
+}
+
+
+async def test_discovery_with_one_lookup(hass, inim_cloud):
+    """Device, zones and scenarios come out of the login and one request."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": "user"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], CREDENTIALS
+    )
+    # The account has a single device, picked without asking.
+    assert result["step_id"] == "zones"
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"zones": ["1", "2"]}
+    )
+    assert result["step_id"] == "panel"
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"panel_name": "Home", **PANEL, "armed_away": 9}
+    )
+    assert result["errors"] == {"base": "invalid_scenario"}
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"panel_name": "Home", **PANEL, "add_another": True}
+    )
+    assert result["step_id"] == "panel"
+    # The entry setup polls on its own once the entry is created.
+    assert inim_cloud.requests["RegisterClient"] == 1
+    assert inim_cloud.requests["GetDevicesExtended"] == 1
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"panel_name": "Garage", **PANEL}
+    )
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"]["device_id"] == DEVICE_ID
+    assert len(result["data"]["panels"]) == 2
+    assert result["options"] == {"zones": [1, 2]}
+
+
+async def test_unknown_device(hass, inim_cloud):
+    """A device that is not one of the account is rejected."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": "user"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {**CREDENTIALS, "device_id": "9999"}
+    )
+
+    assert result["errors"] == {"base": "invalid_device"}
+
+
+async def test_migrated_entry_still_unique(hass, inim_cloud, config_entry):
+    """An entry of 1.1 gets the new unique_id, the same device is not added twice."""
+    hass.config_entries.async_update_entry(
+        config_entry, unique_id="Inim Integration for - user@example.com"
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert config_entry.minor_version == 3
+    assert config_entry.unique_id == f"user@example.com_{DEVICE_ID}"
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": "user"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {**CREDENTIALS, "username": "User@example.com"}
+    )
+
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
@@ -0,0 +1,186 @@
+"""Tests of the Inim coordinator error handling."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.config_entries import SOURCE_REAUTH, ConfigEntryState
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.inim.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CONF_POLL_STRATEGY,
+    DOMAIN,
+    POLL_STRATEGY_PIPELINED,
+    POLL_STRATEGY_SKIP_RECENT,
+    REQUEST_POLL_MAX_AGE,
+)
+
+from .fake_inim_cloud import DEVICE_ID
+
+
+@pytest.fixture(autouse=True)
+def no_retry_backoff():
+    """Retry the failed refreshes right away."""
+    with patch("custom_components.inim.coordinator.FETCH_RETRY_BACKOFF", timedelta(0)):
+        yield
+
+
+async def _async_setup_with_strategy(hass, config_entry, strategy: str):
+    """Set up the entry with a poll strategy, return its coordinator."""
+    hass.config_entries.async_update_entry(
+        config_entry, data={**config_entry.data, CONF_POLL_STRATEGY: strategy}
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+
+async def test_transient_error_is_retried(hass, inim_cloud, config_entry):
+    """A failed request is retried within the same refresh."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+    inim_cloud.fail_next = 1
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.circuit.failures == 0
+
+
+async def test_circuit_opens_and_keeps_last_snapshot(hass, inim_cloud, config_entry):
+    """Repeated failures stop the requests and keep the last good data."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    snapshot = coordinator.data
+
+    inim_cloud.fail_rate = 1.0
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.circuit.is_open
+
+    requests = sum(inim_cloud.requests.values())
+    await coordinator.async_refresh()
+    assert sum(inim_cloud.requests.values()) == requests
+    assert coordinator.data is snapshot
+
+    # Once the circuit is half open a single successful refresh closes it.
+    inim_cloud.fail_rate = 0.0
+    coordinator.circuit._open_until = 0.0
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.circuit.is_open
+
+
+async def test_device_missing_from_account(hass, inim_cloud, config_entry):
+    """A device removed from the account fails the refresh without retries."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    inim_cloud.device_id = "2002"
+    fetches = inim_cloud.requests["GetDevicesExtended"]
+
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert isinstance(coordinator.last_exception, UpdateFailed)
+    assert "1001" in str(coordinator.last_exception)
+    assert inim_cloud.requests["GetDevicesExtended"] == fetches + 1
+    assert coordinator.metrics.counters["refresh_failures"] == 1
+    assert coordinator.circuit.failures == 1
+
+
+async def test_rejected_credentials_start_reauth(hass, inim_cloud, config_entry):
+    """A rejected login fails the setup and asks for the password again."""
+    inim_cloud.reject_login = True
+
+    assert not await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.SETUP_ERROR
+    flows = hass.config_entries.flow.async_progress()
+    assert [flow["context"]["source"] for flow in flows] == [SOURCE_REAUTH]
+    assert flows[0]["step_id"] == "reauth_confirm"
+
+
+async def test_only_subscribed_zones_indexed(hass, inim_cloud, config_entry):
+    """Zones whose entities are all disabled are not indexed nor dispatched."""
+    registry = er.async_get(hass)
+    for zone_id in range(2, len(inim_cloud.zones) + 1):
+        registry.async_get_or_create(
+            "binary_sensor",
+            DOMAIN,
+            f"binary_sensor.inim_{DEVICE_ID}_{zone_id}",
+            config_entry=config_entry,
+            disabled_by=er.RegistryEntryDisabler.USER,
+        )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+    inim_cloud.set_zone_status(1, 2)
+    inim_cloud.set_zone_status(5, 2)
+    await coordinator.async_refresh()
+
+    assert set(coordinator.data.zones) == {1}
+    assert len(coordinator.data.zone_ids) == len(inim_cloud.zones)
+    assert coordinator.metrics.stat("zones_changed").last == 1
+    assert hass.states.get("binary_sensor.zone_1").state == "on"
+
+
+async def test_pipelined_strategy(hass, inim_cloud, config_entry):
+    """RequestPoll and GetDevicesExtended go together, changes lag one refresh."""
+    # GetDevicesExtended answers before the RequestPoll sent along.
+    inim_cloud.poll_delay = 0.05
+    coordinator = await _async_setup_with_strategy(
+        hass, config_entry, POLL_STRATEGY_PIPELINED
+    )
+    requests = inim_cloud.requests.copy()
+
+    inim_cloud.set_zone_status(1, 2)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert inim_cloud.requests["RequestPoll"] == requests["RequestPoll"] + 1
+    assert inim_cloud.requests["GetDevicesExtended"] == (
+        requests["GetDevicesExtended"] + 1
+    )
+    assert coordinator.data.zones[1].status == 1
+    assert hass.states.get("binary_sensor.zone_1").state == "off"
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert inim_cloud.requests["RequestPoll"] == requests["RequestPoll"] + 2
+    assert coordinator.data.zones[1].status == 2
+    assert hass.states.get("binary_sensor.zone_1").state == "on"
+
+
+async def test_skip_recent_strategy(hass, inim_cloud, config_entry, freezer):
+    """RequestPoll is only sent when the last one is REQUEST_POLL_MAX_AGE old."""
+    coordinator = await _async_setup_with_strategy(
+        hass, config_entry, POLL_STRATEGY_SKIP_RECENT
+    )
+    requests = inim_cloud.requests.copy()
+
+    inim_cloud.set_zone_status(1, 2)
+    await coordinator.async_refresh()
+
+    # The answer is the one of the RequestPoll sent by the setup.
+    assert inim_cloud.requests["RequestPoll"] == requests["RequestPoll"]
+    assert inim_cloud.requests["GetDevicesExtended"] == (
+        requests["GetDevicesExtended"] + 1
+    )
+    assert coordinator.data.zones[1].status == 1
+
+    freezer.tick(REQUEST_POLL_MAX_AGE)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert inim_cloud.requests["RequestPoll"] == requests["RequestPoll"] + 1
+    assert inim_cloud.requests["GetDevicesExtended"] == (
+        requests["GetDevicesExtended"] + 2
+    )
+    assert coordinator.data.zones[1].status == 2
+    assert hass.states.get("binary_sensor.zone_1").state == "on"
@@ -0,0 +1,58 @@
+"""Tests of the Inim metrics, diagnostic sensors and diagnostics."""
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.inim.const import DOMAIN
+from custom_components.inim.diagnostics import async_get_config_entry_diagnostics
+from custom_components.inim.metrics import RollingStat
+
+
+def test_rolling_stat_percentiles():
+    """Percentiles only cover the samples in the window."""
+    stat = RollingStat(size=10)
+    for value in range(1, 21):
+        stat.add(value)
+
+    assert stat.count == 20
+    assert stat.last == 20
+    assert stat.percentile(50) == 15
+    assert stat.percentile(95) == 20
+    assert RollingStat().percentile(50) is None
+
+
+async def test_diagnostics(hass, inim_cloud, config_entry):
+    """The diagnostics redact the credentials and carry the metrics."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    inim_cloud.set_zone_status(1, 2)
+    await coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    for key in ("username", "password", "client_id", "device_id"):
+        assert diagnostics["entry"][key] == "**REDACTED**"
+    stats = diagnostics["coordinator"]["metrics"]["stats"]
+    assert stats["get_devices_extended"]["count"] == 2
+    assert stats["zones_changed"]["last"] == 1
+    assert stats["update_listeners"]["count"] >= 1
+    hub_stats = diagnostics["hub"]["metrics"]["stats"]
+    assert hub_stats["payload_bytes"]["count"] == 2
+    assert 0 < hub_stats["payload_bytes"]["last"] < inim_cloud.payload_bytes
+
+
+async def test_diagnostic_sensors_disabled_by_default(hass, inim_cloud, config_entry):
+    """The diagnostic sensors are registered but disabled."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entries = [
+        entry
+        for entry in er.async_entries_for_config_entry(
+            er.async_get(hass), config_entry.entry_id
+        )
+        if entry.domain == "sensor"
+    ]
+    assert len(entries) == 6
+    assert all(
+        entry.disabled_by is er.RegistryEntryDisabler.INTEGRATION for entry in entries
+    )
@@ -0,0 +1,95 @@
+"""Tests of the zone and scenario history."""
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.inim.const import (
+    DOMAIN,
+    EVENT_TRANSITIONS,
+    HISTORY_FLUSH_DELAY,
+    SERVICE_GET_HISTORY,
+)
+from custom_components.inim.logbook import async_describe_events
+
+
+async def test_transitions_batched(hass, inim_cloud, config_entry):
+    """The transitions of consecutive polls are fired as a single event."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    events = async_capture_events(hass, EVENT_TRANSITIONS)
+
+    inim_cloud.set_zone_status(1, 2)
+    inim_cloud.zones[2]["AlarmMemory"] = 1
+    await coordinator.async_refresh()
+    inim_cloud.set_zone_status(1, 1)
+    inim_cloud.active_scenarios = [2]
+    await coordinator.async_refresh()
+    assert not events
+
+    async_fire_time_changed(hass, dt_util.utcnow() + HISTORY_FLUSH_DELAY)
+    await hass.async_block_till_done()
+
+    assert len(events) == 1
+    transitions = [
+        (t["zone_id"], t["field"], t["old"], t["new"])
+        for t in events[0].data["transitions"]
+    ]
+    assert len(transitions) == 4
+    assert (1, "status", 1, 2) in transitions
+    assert (3, "alarm_memory", 0, 1) in transitions
+    assert (1, "status", 2, 1) in transitions
+    assert (None, "active_scenarios", [1], [2]) in transitions
+
+
+async def test_get_history_service(hass, inim_cloud, config_entry):
+    """The service returns the last transitions, oldest first."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    for status in (2, 1, 2):
+        inim_cloud.set_zone_status(4, status)
+        await coordinator.async_refresh()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        {"config_entry_id": config_entry.entry_id, "limit": 2},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert [(t["zone_id"], t["new"]) for t in response["transitions"]] == [
+        (4, 1),
+        (4, 2),
+    ]
+
+
+async def test_logbook_entry(hass, inim_cloud, config_entry):
+    """A batch of transitions is rendered as one logbook entry."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    events = async_capture_events(hass, EVENT_TRANSITIONS)
+    described = {}
+    async_describe_events(
+        hass,
+        lambda domain, event_type, describe: described.update(
+            {(domain, event_type): describe}
+        ),
+    )
+
+    inim_cloud.set_zone_status(1, 2)
+    inim_cloud.active_scenarios = [2]
+    await coordinator.async_refresh()
+    async_fire_time_changed(hass, dt_util.utcnow() + HISTORY_FLUSH_DELAY)
+    await hass.async_block_till_done()
+
+    entry = described[(DOMAIN, EVENT_TRANSITIONS)](events[0])
+    assert entry["name"] == "Inim 1001"
+    assert sorted(entry["message"].split(", ")) == [
+        "Zone 1 status 1 -> 2",
+        "active scenarios [1] -> [2]",
+    ]
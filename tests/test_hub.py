@@ -0,0 +1,141 @@
+"""Tests of the hub shared by the entries of an account."""
+import asyncio
+from datetime import timedelta
+from time import time
+
+from homeassistant.helpers import entity_registry as er
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.inim.const import (
+    DATA_SESSION,
+    DOMAIN,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_STORAGE_KEY,
+    TOKEN_STORAGE_VERSION,
+)
+
+from .fake_inim_cloud import TOKEN
+
+TOKEN_KEY = "user@example.com:homeassistant"
+
+
+def _store_token(hass_storage, expires_at: float) -> None:
+    """Persist a token of the account, as a previous run left it."""
+    hass_storage[TOKEN_STORAGE_KEY] = {
+        "version": TOKEN_STORAGE_VERSION,
+        "key": TOKEN_STORAGE_KEY,
+        "data": {TOKEN_KEY: {"token": TOKEN, "expires_at": expires_at}},
+    }
+
+
+@pytest.fixture
+async def coordinators(hass, inim_cloud, config_entry, other_entry):
+    """Set up both entries of the account, return their coordinators."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return (
+        hass.data[DOMAIN][config_entry.entry_id].coordinator,
+        hass.data[DOMAIN][other_entry.entry_id].coordinator,
+    )
+
+
+async def test_account_shares_token_and_session(
+    hass, inim_cloud, config_entry, other_entry, coordinators
+):
+    """The entries of an account log in once and use the same session."""
+    hub = hass.data[DOMAIN][config_entry.entry_id].hub
+    entry_ids = {config_entry.entry_id, other_entry.entry_id}
+
+    assert hass.data[DOMAIN][other_entry.entry_id].hub is hub
+    assert hub.entry_ids == entry_ids
+    assert hub.device_ids == {"1001", "2002"}
+    assert inim_cloud.requests["RegisterClient"] == 1
+    assert hass.data[DATA_SESSION].entry_ids == entry_ids
+
+    session = hass.data[DATA_SESSION].session
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert hub.entry_ids == {other_entry.entry_id}
+    assert hub.device_ids == {"2002"}
+    assert not session.closed
+
+
+async def test_concurrent_refreshes_share_fetch(hass, inim_cloud, coordinators):
+    """Refreshes of the account in flight together send one GetDevicesExtended."""
+    inim_cloud.latency = 0.1
+    requests = inim_cloud.requests.copy()
+
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+
+    assert inim_cloud.requests["GetDevicesExtended"] == (
+        requests["GetDevicesExtended"] + 1
+    )
+    # One per device of the account.
+    assert inim_cloud.requests["RequestPoll"] == requests["RequestPoll"] + 2
+    assert all(coordinator.last_update_success for coordinator in coordinators)
+
+
+async def test_refresh_shared_with_account(
+    hass, inim_cloud, other_entry, coordinators
+):
+    """A refresh of one device updates the other devices of the account."""
+    first, second = coordinators
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "binary_sensor", DOMAIN, "binary_sensor.inim_2002_1"
+    )
+    requests = inim_cloud.requests.copy()
+    inim_cloud.set_zone_status(1, 2)
+
+    await first.async_refresh()
+    await hass.async_block_till_done()
+
+    assert inim_cloud.requests["GetDevicesExtended"] == (
+        requests["GetDevicesExtended"] + 1
+    )
+    assert inim_cloud.requests["RequestPoll"] == requests["RequestPoll"] + 2
+    assert second.data.zones[1].status == 2
+    assert hass.states.get(entity_id).state == "on"
+    # Its own next refresh is scheduled from the shared one.
+    assert second.update_interval == second.poll_policy.min_interval
+
+
+async def test_token_reused_after_restart(
+    hass, hass_storage, inim_cloud, config_entry
+):
+    """A persisted token that did not expire spares the login."""
+    _store_token(hass_storage, time() + timedelta(days=7).total_seconds())
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert inim_cloud.requests["RegisterClient"] == 0
+    assert inim_cloud.requests["GetDevicesExtended"] == 1
+
+
+async def test_token_renewed_before_expiry(
+    hass, hass_storage, inim_cloud, config_entry, freezer
+):
+    """The token is renewed in the background, TOKEN_REFRESH_MARGIN ahead."""
+    expires_at = time() + (TOKEN_REFRESH_MARGIN + timedelta(hours=1)).total_seconds()
+    _store_token(hass_storage, expires_at)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    freezer.tick(timedelta(minutes=59))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert inim_cloud.requests["RegisterClient"] == 0
+
+    freezer.tick(timedelta(minutes=1, seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert inim_cloud.requests["RegisterClient"] == 1
+
+    # The new token is persisted for the next restart.
+    freezer.tick(timedelta(seconds=2))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass_storage[TOKEN_STORAGE_KEY]["data"][TOKEN_KEY]["expires_at"] > (
+        expires_at
+    )
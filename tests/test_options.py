@@ -0,0 +1,190 @@
+"""Tests of the options flow, applied without reloading the entry."""
+from datetime import timedelta
+
+import pytest
+
+from homeassistant.data_entry_flow import FlowResultType, InvalidData
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.inim.const import DOMAIN
+
+from .fake_inim_cloud import DEVICE_ID
+
+
+async def _async_set_options(hass, config_entry, zones, away=5):
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"scan_interval": 60, "zones": zones}
+    )
+    assert result["step_id"] == "scenarios"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            "armed_away": away,
+            "disarmed": 1,
+            "armed_night": 2,
+            "armed_home": 3,
+            "armed_vacation": 0,
+        },
+    )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+
+async def test_options_applied_in_place(hass, inim_cloud, config_entry):
+    """Interval, scenarios and zones change without a new login or entities."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    runtime_data = hass.data[DOMAIN][config_entry.entry_id]
+    logins = inim_cloud.requests["RegisterClient"]
+    inim_cloud.active_scenarios = [5]
+
+    await _async_set_options(hass, config_entry, ["1", "2"])
+
+    assert hass.data[DOMAIN][config_entry.entry_id] is runtime_data
+    assert inim_cloud.requests["RegisterClient"] == logins
+    assert runtime_data.coordinator.poll_policy.base_interval == timedelta(seconds=60)
+    await runtime_data.coordinator.async_refresh()
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "armed_away"
+    )
+    assert hass.states.get("binary_sensor.zone_1") is not None
+    assert hass.states.get("binary_sensor.zone_3") is None
+    registry = er.async_get(hass)
+    zone_entries = [
+        entry
+        for entry in er.async_entries_for_config_entry(registry, config_entry.entry_id)
+        if entry.domain == "binary_sensor"
+    ]
+    assert len(zone_entries) == 2 * 4
+    device_registry = dr.async_get(hass)
+    assert device_registry.async_get_device(identifiers={(DOMAIN, f"{DEVICE_ID}_1")})
+    assert not device_registry.async_get_device(
+        identifiers={(DOMAIN, f"{DEVICE_ID}_3")}
+    )
+
+
+async def test_options_unknown_scenario(hass, inim_cloud, config_entry):
+    """Scenarios that are not of the panel are rejected, as in the config flow."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"scan_interval": 60, "zones": ["1"]}
+    )
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {**config_entry.data["panels"][0]["scenarios"], "armed_away": 9},
+    )
+
+    assert result["step_id"] == "scenarios"
+    assert result["errors"] == {"base": "invalid_scenario"}
+
+
+async def test_options_state_precedence(hass, inim_cloud, config_entry):
+    """The precedence of a panel changes which state a shared scenario shows."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    inim_cloud.active_scenarios = [0]
+    await hass.data[DOMAIN][config_entry.entry_id].coordinator.async_refresh()
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "armed_away"
+    )
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"scan_interval": 60, "zones": ["1"]}
+    )
+    scenarios = config_entry.data["panels"][0]["scenarios"]
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {**scenarios, "state_precedence": "armed_vacation, armed_away"},
+    )
+    assert result["errors"] == {"base": "invalid_precedence"}
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            **scenarios,
+            "state_precedence": (
+                "armed_vacation, armed_away, disarmed, armed_night, armed_home"
+            ),
+        },
+    )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "armed_vacation"
+    )
+
+
+async def test_options_device_not_found(hass, inim_cloud, config_entry):
+    """The flow aborts when the account no longer has the device."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    inim_cloud.device_id = "2002"
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "device_not_found"
+
+
+async def test_options_include_zones_again(hass, inim_cloud, config_entry):
+    """Zones included again get their entities back, out of a full refresh."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    await _async_set_options(hass, config_entry, ["1"])
+    await coordinator.async_refresh()
+    assert 3 not in coordinator.data.zones
+
+    inim_cloud.set_zone_status(3, 2)
+    await _async_set_options(hass, config_entry, ["1", "3"])
+
+    assert hass.states.get("binary_sensor.zone_3").state == "on"
+
+
+async def test_options_scan_interval_bounds(hass, inim_cloud, config_entry):
+    """The adaptive bounds are options too, around the scan interval."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            "scan_interval": 300,
+            "min_scan_interval": 20,
+            "max_scan_interval": 200,
+            "zones": ["1"],
+        },
+    )
+    assert result["errors"] == {"base": "scan_interval_bounds"}
+    with pytest.raises(InvalidData):
+        await hass.config_entries.options.async_configure(
+            result["flow_id"], {"scan_interval": 5, "zones": ["1"]}
+        )
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            "scan_interval": 60,
+            "min_scan_interval": 20,
+            "max_scan_interval": 200,
+            "zones": ["1"],
+        },
+    )
+    assert result["step_id"] == "scenarios"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], config_entry.data["panels"][0]["scenarios"]
+    )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+
+    policy = coordinator.poll_policy
+    assert policy.min_interval == timedelta(seconds=20)
+    assert policy.max_interval == timedelta(seconds=200)
+    assert policy.base_interval == timedelta(seconds=60)
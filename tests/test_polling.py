@@ -0,0 +1,108 @@
+"""Tests of the adaptive polling policy."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.inim.polling import AdaptivePollPolicy
+
+MIN = timedelta(seconds=10)
+BASE = timedelta(seconds=30)
+MAX = timedelta(seconds=120)
+FAST = timedelta(minutes=2)
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Start at an arbitrary time."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+    def tick(self, delta: timedelta) -> None:
+        """Move the clock forward."""
+        self.now += delta.total_seconds()
+
+
+@pytest.fixture
+def clock():
+    """Drive the clock of the polling module."""
+    clock = FakeClock()
+    with patch("custom_components.inim.polling.monotonic", clock):
+        yield clock
+
+
+@pytest.fixture
+def policy(clock):
+    """Return a policy polling every 30 s, between 10 s and 2 min."""
+    return AdaptivePollPolicy(BASE, MIN, MAX, FAST)
+
+
+def test_idle(policy):
+    """Every quiet poll doubles the interval, up to the max one."""
+    assert policy.interval == BASE
+    assert [policy.success(changed=False) for _ in range(4)] == [
+        timedelta(seconds=60),
+        MAX,
+        MAX,
+        MAX,
+    ]
+
+
+def test_fast_window(policy, clock):
+    """A change polls at the min interval until the fast period is over."""
+    assert policy.success(changed=True) == MIN
+
+    clock.tick(FAST - timedelta(seconds=1))
+    assert policy.success(changed=False) == MIN
+
+    clock.tick(timedelta(seconds=1))
+    assert policy.success(changed=False) == 2 * MIN
+    assert policy.success(changed=False) == 4 * MIN
+
+
+def test_change_restarts_fast_window(policy, clock):
+    """A change within the fast period extends it."""
+    policy.success(changed=True)
+    clock.tick(FAST / 2)
+    assert policy.success(changed=True) == MIN
+
+    clock.tick(FAST / 2)
+    assert policy.success(changed=False) == MIN
+
+
+def test_activity(policy, clock):
+    """A command sent switches to fast polling too."""
+    assert policy.activity() == MIN
+
+    clock.tick(FAST / 2)
+    assert policy.success(changed=False) == MIN
+
+
+def test_backoff(policy):
+    """Failures back off up to the max interval, a success resets it."""
+    assert [policy.failure() for _ in range(3)] == [
+        timedelta(seconds=60),
+        MAX,
+        MAX,
+    ]
+
+    # Back to the base interval, then the quiet poll doubles it.
+    assert policy.success(changed=False) == 2 * BASE
+    policy.failure()
+    assert policy.success(changed=True) == MIN
+
+
+def test_intervals_clamped(clock):
+    """The base interval stays within the min and max ones."""
+    assert AdaptivePollPolicy(timedelta(seconds=5), MIN, MAX).interval == MIN
+    assert AdaptivePollPolicy(timedelta(minutes=5), MIN, MAX).interval == MAX
+    policy = AdaptivePollPolicy(BASE, MIN, timedelta(seconds=5))
+    assert policy.max_interval == MIN
+    assert policy.set_interval(timedelta(seconds=60), MIN, MAX) == (
+        timedelta(seconds=60)
+    )
@@ -0,0 +1,86 @@
+"""Tests of the startup from the cached snapshot."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.inim.const import (
+    DOMAIN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+
+
+async def test_snapshot_saved(hass, hass_storage, inim_cloud, config_entry):
+    """A live snapshot is written to disk after the save delay."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    cached = hass_storage[f"{SNAPSHOT_STORAGE_KEY}.{config_entry.entry_id}"]["data"]
+    assert len(cached["zones"]) == len(inim_cloud.zones)
+    assert cached["active_scenarios"] == [1]
+
+
+async def test_startup_from_stale_snapshot(
+    hass, hass_storage, inim_cloud, config_entry
+):
+    """The entities start from the cached snapshot, not past a failed refresh."""
+    hass_storage[f"{SNAPSHOT_STORAGE_KEY}.{config_entry.entry_id}"] = {
+        "version": SNAPSHOT_STORAGE_VERSION,
+        "key": f"{SNAPSHOT_STORAGE_KEY}.{config_entry.entry_id}",
+        "data": {"zones": [[1, 2, "Hall", 1]], "active_scenarios": [0]},
+    }
+    inim_cloud.fail_rate = 1.0
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id].coordinator
+    with patch("custom_components.inim.coordinator.FETCH_RETRY_BACKOFF", timedelta(0)):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.LOADED
+    assert not coordinator.last_update_success
+    assert coordinator.stale
+    assert hass.states.get("binary_sensor.hall").state == "unavailable"
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "unavailable"
+    )
+
+    # The first live refresh replaces the snapshot, clears the flag and adds
+    # the zones the snapshot did not know about.
+    inim_cloud.fail_rate = 0.0
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert not coordinator.stale
+    assert hass.states.get("binary_sensor.hall").state == "off"
+    assert "stale" not in hass.states.get("binary_sensor.hall").attributes
+    assert len(hass.states.async_entity_ids("binary_sensor")) == len(inim_cloud.zones)
+
+
+async def test_stale_snapshot_flagged(hass, hass_storage, inim_cloud, config_entry):
+    """Until the first live refresh, the cached states are flagged stale."""
+    hass_storage[f"{SNAPSHOT_STORAGE_KEY}.{config_entry.entry_id}"] = {
+        "version": SNAPSHOT_STORAGE_VERSION,
+        "key": f"{SNAPSHOT_STORAGE_KEY}.{config_entry.entry_id}",
+        "data": {"zones": [[1, 2, "Hall", 1]], "active_scenarios": [0]},
+    }
+
+    with patch("custom_components.inim.InimCoordinator.async_refresh"):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    state = hass.states.get("binary_sensor.hall")
+    assert state.state == "on"
+    assert state.attributes["stale"] is True
+    assert hass.states.get("alarm_control_panel.inim_alarm_panel").state == (
+        "armed_away"
+    )